@@ -0,0 +1,73 @@
+"""
+Import-time budget for job discovery.
+
+Imports every module under jobs/ in a fresh interpreter after ``nautobot.setup()``,
+the way a worker does when it syncs this repository, and reports the time each
+module took and which top-level packages it pulled in. Packages Nautobot itself
+loads (Django, requests, ...) are already imported by then, so the times are the
+repository's own cost. Exits with status 1 when the total goes over ``--budget``
+milliseconds, so it can run as a CI check::
+
+    NAUTOBOT_CONFIG=... python benchmarks/import_budget.py --budget 300
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 300
+
+_CHILD = """
+import importlib, json, os, sys, time
+import nautobot
+nautobot.setup()
+sys.path.insert(0, os.path.dirname({root!r}))
+package = os.path.basename({root!r})
+importlib.import_module(package)
+results = []
+for name in {modules!r}:
+    before = {{module.split(".")[0] for module in sys.modules}}
+    started = time.perf_counter()
+    importlib.import_module(f"{{package}}.jobs.{{name}}")
+    elapsed = time.perf_counter() - started
+    loaded = sorted({{module.split(".")[0] for module in sys.modules}} - before - {{package}})
+    results.append({{"module": name, "ms": round(elapsed * 1000, 1), "loaded": loaded}})
+print(json.dumps(results))
+"""
+
+
+def job_modules():
+    jobs_dir = os.path.join(REPO_ROOT, "jobs")
+    return sorted(
+        name[:-3] for name in os.listdir(jobs_dir) if name.endswith(".py") and name != "__init__.py"
+    )
+
+
+def measure():
+    """
+    Return ``[{"module", "ms", "loaded"}]`` from importing the job modules in a new interpreter.
+    """
+    code = _CHILD.format(root=REPO_ROOT, modules=job_modules())
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check how long job discovery takes for this repository.")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="Total import time allowed, in ms.")
+    args = parser.parse_args()
+
+    results = measure()
+    total = sum(result["ms"] for result in results)
+    for result in results:
+        print(f"{result['module']:<28}{result['ms']:>8.1f} ms  {' '.join(result['loaded'])}")
+    print(f"{'total':<28}{total:>8.1f} ms  (budget {args.budget:.0f} ms)")
+    if total > args.budget:
+        print(f"FAIL: job discovery took {total:.1f} ms, over the {args.budget:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
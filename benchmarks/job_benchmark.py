@@ -0,0 +1,247 @@
+"""
+Throughput benchmark for the RACOM jobs against the local device simulator.
+
+Creates ``--devices`` fixture Devices whose Domain custom field points at
+virtual devices served by racom_simulator.py, runs the selected jobs through
+Nautobot's job runner and reports wall-clock time, devices/sec, peak memory and
+database queries per job. Run it in a Nautobot environment where this repository
+is synced as a Git repository and its jobs are installed::
+
+    NAUTOBOT_CONFIG=... python benchmarks/job_benchmark.py --devices 2000 --latency 0.2 --jitter 0.1
+
+Fixtures and the JobResults of the runs are deleted afterwards.
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import uuid
+
+from racom_simulator import DEFAULT_PORT, RacomSimulator, SimulatorState, device_address
+
+FIXTURE_PREFIX = "racom-bench"
+BENCHMARKS = ("ping", "contextual", "hook")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the RACOM jobs against simulated devices.")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--hook-events", type=int, default=50, help="Device changes fed to the change hook.")
+    parser.add_argument("--jobs", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=15, help="Seconds a simulated timeout holds the request.")
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    parser.add_argument("--username", default="racom-benchmark")
+    parser.add_argument("--json", dest="json_file", help="Also write the results to this file.")
+    return parser.parse_args()
+
+
+def create_fixtures(count):
+    from nautobot.dcim.models import Device, DeviceType, Location, LocationType, Manufacturer
+    from nautobot.extras.choices import CustomFieldTypeChoices
+    from nautobot.extras.models import CustomField, Role, Status
+    from django.contrib.contenttypes.models import ContentType
+
+    device_ct = ContentType.objects.get_for_model(Device)
+    custom_field, _ = CustomField.objects.get_or_create(
+        key="Domain", defaults={"label": "Domain", "type": CustomFieldTypeChoices.TYPE_TEXT}
+    )
+    custom_field.content_types.add(device_ct)
+    status = Status.objects.get_for_model(Device).first()
+    location_type, _ = LocationType.objects.get_or_create(name=FIXTURE_PREFIX)
+    location_type.content_types.add(device_ct)
+    location, _ = Location.objects.get_or_create(
+        name=FIXTURE_PREFIX, location_type=location_type, defaults={"status": status}
+    )
+    role, _ = Role.objects.get_or_create(name=FIXTURE_PREFIX)
+    role.content_types.add(device_ct)
+    manufacturer, _ = Manufacturer.objects.get_or_create(name=FIXTURE_PREFIX)
+    device_type, _ = DeviceType.objects.get_or_create(manufacturer=manufacturer, model=FIXTURE_PREFIX)
+    Device.objects.bulk_create(
+        [
+            Device(
+                name=f"{FIXTURE_PREFIX}-{i:05d}",
+                device_type=device_type,
+                role=role,
+                status=status,
+                location=location,
+                _custom_field_data={"Domain": device_address(i)},
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+    return device_type
+
+
+def delete_fixtures(device_type, job_result_pks):
+    from nautobot.dcim.models import Device, Location, LocationType, Manufacturer
+    from nautobot.extras.models import JobResult, ObjectChange, Role
+
+    devices = Device.objects.filter(device_type=device_type)
+    ObjectChange.objects.filter(changed_object_id__in=devices.values("pk")).delete()
+    devices.delete()
+    device_type.delete()
+    Manufacturer.objects.filter(name=FIXTURE_PREFIX).delete()
+    Location.objects.filter(name=FIXTURE_PREFIX).delete()
+    LocationType.objects.filter(name=FIXTURE_PREFIX).delete()
+    Role.objects.filter(name=FIXTURE_PREFIX).delete()
+    JobResult.objects.filter(pk__in=job_result_pks).delete()
+
+
+def job_model(job_class_name):
+    from nautobot.extras.models import Job as JobModel
+
+    model = JobModel.objects.filter(job_class_name=job_class_name, installed=True).first()
+    if model is None:
+        sys.exit(f"Job {job_class_name} is not installed; sync this repository into Nautobot first.")
+    return model
+
+
+def reset_device_state(package, device_type):
+    """
+    Drop cached circuit, snapshot and reachability state so every run starts cold.
+    """
+    from django.core.cache import cache
+    from nautobot.dcim.models import Device
+
+    health = importlib.import_module(f"{package}.racom_health")
+    snapshots = importlib.import_module(f"{package}.racom_snapshots")
+    reachability = importlib.import_module(f"{package}.racom_reachability")
+    keys = []
+    for pk, domain in Device.objects.filter(device_type=device_type).values_list("pk", "_custom_field_data__Domain"):
+        keys += [health.CircuitBreaker._key(domain), snapshots._key(pk), reachability._key(pk)]
+    cache.delete_many(keys)
+
+
+def measure(label, device_count, func):
+    """
+    Run ``func`` and return its wall-clock time, throughput, memory and query counts.
+
+    tracemalloc slows allocation-heavy code down, so compare devices/sec only between
+    runs of this script, not with production timings.
+    """
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+    from nautobot.extras.models.jobs import JOB_LOGS
+
+    tracemalloc.start()
+    with CaptureQueriesContext(connections["default"]) as queries, \
+            CaptureQueriesContext(connections[JOB_LOGS]) as log_queries:
+        started = time.perf_counter()
+        job_results = func()
+        elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "job": label,
+        "devices": device_count,
+        "seconds": round(elapsed, 3),
+        "devices_per_second": round(device_count / elapsed, 1) if elapsed else None,
+        "peak_python_mb": round(peak / 2**20, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "db_queries": len(queries),
+        "job_log_queries": len(log_queries),
+        "statuses": sorted({job_result.status for job_result in job_results}),
+        "job_results": [str(job_result.pk) for job_result in job_results],
+    }
+
+
+def run_benchmarks(args, device_type):
+    from nautobot.core.testing import run_job_for_testing
+    from nautobot.dcim.models import Device
+    from nautobot.extras.choices import ObjectChangeActionChoices
+    from nautobot.users.models import User
+
+    ping_model = job_model("RacomDevicePing")
+    package = ping_model.job_class.__module__.rsplit(".", 1)[0]
+    client = importlib.import_module(f"{package}.racom_client")
+    if client.RACOM_PORT != args.port:
+        sys.exit(f"Jobs were imported before RACOM_PORT was set (port {client.RACOM_PORT}); run this script directly.")
+    user, _ = User.objects.get_or_create(username=args.username, defaults={"is_superuser": True})
+    results = []
+
+    if "ping" in args.jobs:
+        reset_device_state(package, device_type)
+        data = ping_model.job_class.serialize_data(
+            {"device_type": device_type, "max_concurrency": args.max_concurrency, "job_deadline": 3600}
+        )
+        results.append(measure("RacomDevicePing", args.devices, lambda: [
+            run_job_for_testing(ping_model, username=args.username, **data)
+        ]))
+
+    if "contextual" in args.jobs:
+        reset_device_state(package, device_type)
+        button_model = job_model("RacomDeviceContextualPing")
+        results.append(measure("RacomDeviceContextualPing", args.devices, lambda: [
+            run_job_for_testing(
+                button_model, username=args.username, object_pk=str(device_type.pk), object_model_name="dcim.devicetype"
+            )
+        ]))
+
+    if "hook" in args.jobs:
+        reset_device_state(package, device_type)
+        hook_model = job_model("RacomDeviceChangeHook")
+        devices = list(Device.objects.filter(device_type=device_type).order_by("name")[:args.hook_events])
+        changes = []
+        for device in devices:
+            change = device.to_objectchange(ObjectChangeActionChoices.ACTION_UPDATE)
+            change.user = user
+            change.request_id = uuid.uuid4()
+            change.save()
+            changes.append(change)
+        # The simulator names its devices "sim-<address>", so every event deploys a name fix.
+        results.append(measure("RacomDeviceChangeHook", len(changes), lambda: [
+            run_job_for_testing(hook_model, username=args.username, object_change=str(change.pk))
+            for change in changes
+        ]))
+
+    return results
+
+
+def main():
+    args = parse_args()
+    # Must be set before the job modules are imported; racom_client reads them at import time.
+    os.environ["RACOM_SCHEME"] = "https" if args.certfile else "http"
+    os.environ["RACOM_PORT"] = str(args.port)
+
+    import nautobot
+
+    nautobot.setup()
+
+    state = SimulatorState(args.latency, args.jitter, args.failure_rate, args.timeout_rate, args.hang)
+    server = RacomSimulator(("", args.port), state, args.certfile, args.keyfile).start()
+    device_type = create_fixtures(args.devices)
+    results = []
+    try:
+        results = run_benchmarks(args, device_type)
+    finally:
+        server.shutdown()
+        server.server_close()
+        delete_fixtures(device_type, [pk for result in results for pk in result["job_results"]])
+
+    print(f"{'job':<28}{'devices':>8}{'seconds':>10}{'dev/s':>10}{'peak MB':>9}{'rss MB':>9}{'queries':>9}{'log q':>7}  status")
+    for result in results:
+        print(
+            f"{result['job']:<28}{result['devices']:>8}{result['seconds']:>10}{result['devices_per_second']:>10}"
+            f"{result['peak_python_mb']:>9}{result['max_rss_mb']:>9}{result['db_queries']:>9}"
+            f"{result['job_log_queries']:>7}  {','.join(result['statuses'])}"
+        )
+    print(f"Simulator answered {state.requests} requests.")
+    if args.json_file:
+        with open(args.json_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Local stand-in for a fleet of RACOM radios.
+
+Serves ``/cgi-bin/login.cgi`` and ``/cgi-bin/rpc.cgi`` the way the devices do,
+for any number of virtual devices. A device is identified by the host the client
+addressed (the ``Host`` header), so every loopback address - 127.10.0.1,
+127.10.0.2, ... - is a separate radio with its own config, tokens and pending
+settings saves, while one server process answers for all of them. Latency,
+jitter, failure and timeout rates are configurable to imitate slow links.
+
+Point the jobs at it with::
+
+    python benchmarks/racom_simulator.py --port 8443 --latency 0.2 --jitter 0.1
+    RACOM_SCHEME=http RACOM_PORT=8443 nautobot-server ...
+
+``--certfile``/``--keyfile`` serve HTTPS instead of plain HTTP.
+"""
+import argparse
+import copy
+import json
+import random
+import secrets
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8443
+DEFAULT_REBOOT_DELAY = 3
+DEFAULT_HANG = 60
+USERNAME = "admin"
+PASSWORD = "admin"
+
+# Shape of a settings_get config_data blob; the padding sections make payloads realistically large.
+BASE_CONFIG = {
+    "main": {"RR_StationName": "", "RR_Mode": "bridge", "RR_Location": ""},
+    "radio": {"RF_Frequency": 439000000, "RF_Power": 10, "RF_Bandwidth": 25000, "RF_Channels": list(range(32))},
+    "interfaces": {f"eth{i}": {"enabled": True, "mtu": 1500, "vlan": [10, 20, 30]} for i in range(4)},
+    "routing": {"static": [{"dst": f"10.{i}.0.0/16", "gw": f"192.168.0.{i}"} for i in range(32)]},
+}
+
+
+def device_address(index):
+    """
+    Return the loopback address of virtual device ``index`` (0-based).
+    """
+    return f"127.10.{index // 250}.{index % 250 + 1}"
+
+
+def merge_config(config, changes):
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            merge_config(config[key], value)
+        else:
+            config[key] = value
+
+
+class VirtualDevice:
+    def __init__(self, domain):
+        self.lock = threading.Lock()
+        self.config = copy.deepcopy(BASE_CONFIG)
+        self.config["main"]["RR_StationName"] = f"sim-{domain}"
+        self.tokens = set()
+        self.saves = {}
+
+
+class SimulatorState:
+    """
+    Virtual devices, created on first contact, plus the fault settings shared by all of them.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, timeout_rate=0.0, hang=DEFAULT_HANG,
+                 reboot_delay=DEFAULT_REBOOT_DELAY, seed=None, partial_saves=True):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.reboot_delay = reboot_delay
+        self.partial_saves = partial_saves
+        self.random = random.Random(seed)
+        self._devices = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def device(self, domain):
+        with self._lock:
+            self.requests += 1
+            device = self._devices.get(domain)
+            if device is None:
+                device = self._devices[domain] = VirtualDevice(domain)
+            return device
+
+    def delay(self):
+        """
+        Return how long to wait before answering, or None to answer with an HTTP 500.
+        """
+        with self._lock:
+            roll = self.random.random()
+            jitter = self.random.uniform(-self.jitter, self.jitter)
+        if roll < self.timeout_rate:
+            return self.hang
+        if roll < self.timeout_rate + self.failure_rate:
+            return None
+        return max(0.0, self.latency + jitter)
+
+
+class RacomRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "RacomSimulator/1.0"
+    # Headers and body go out in separate writes; without this Nagle holds the body back
+    # until the client ACKs the headers, adding ~40 ms to every request.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body=None):
+        data = json.dumps(body if body is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            # Echo the client's "Connection: close" the way the radios' web server does.
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        state = self.server.state
+        payload = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        domain = (self.headers.get("Host") or self.connection.getsockname()[0]).rsplit(":", 1)[0]
+        device = state.device(domain)
+        delay = state.delay()
+        if delay is None:
+            return self._reply(500, {"error": "simulated failure"})
+        time.sleep(delay)
+        try:
+            payload = json.loads(payload or b"{}")
+        except ValueError:
+            return self._reply(400, {"error": "invalid JSON"})
+        if self.path == "/cgi-bin/login.cgi":
+            return self._login(device, payload)
+        if self.path == "/cgi-bin/rpc.cgi":
+            return self._rpc(device, payload)
+        return self._reply(404, {"error": f"unknown script {self.path}"})
+
+    def _login(self, device, payload):
+        if payload.get("username") != USERNAME or payload.get("password") != PASSWORD:
+            return self._reply(403, {"error": "invalid credentials"})
+        token = secrets.token_hex(16)
+        with device.lock:
+            device.tokens.add(token)
+        return self._reply(200, {"token": token})
+
+    def _rpc(self, device, payload):
+        method = payload.get("method")
+        params = payload.get("params") or {}
+        if method == "device_ping":
+            return self._reply(200, {"result": "pong"})
+        with device.lock:
+            authenticated = self.headers.get("apikey") in device.tokens
+        if not authenticated:
+            return self._reply(401, {"error": "unauthorized"})
+        if method == "settings_get":
+            with device.lock:
+                config = copy.deepcopy(device.config)
+            return self._reply(200, {"result": {"config_data": config}})
+        if method == "settings_save_init":
+            config = params.get("config_data")
+            if not isinstance(config, dict):
+                return self._reply(400, {"error": "config_data missing"})
+            if params.get("partial") and not self.server.state.partial_saves:
+                return self._reply(400, {"error": "partial saves not supported"})
+            session_id = secrets.token_hex(8)
+            with device.lock:
+                if params.get("partial"):
+                    merge_config(device.config, copy.deepcopy(config))
+                else:
+                    device.config = copy.deepcopy(config)
+                device.saves[session_id] = time.monotonic() + self.server.state.reboot_delay
+            return self._reply(200, {"result": {"session_id": session_id, "interval": 1}})
+        if method == "settings_save_reconnect":
+            with device.lock:
+                ready_at = device.saves.get(params.get("session_id"))
+            if ready_at is None:
+                return self._reply(404, {"error": "unknown session"})
+            if time.monotonic() < ready_at:
+                return self._reply(503, {"error": "applying settings"})
+            return self._reply(200, {"result": "reconnected"})
+        return self._reply(400, {"error": f"unknown method {method}"})
+
+
+class RacomSimulator(ThreadingHTTPServer):
+    """
+    Threaded HTTP(S) server answering for every virtual device.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address=("", DEFAULT_PORT), state=None, certfile=None, keyfile=None, verbose=False):
+        super().__init__(address, RacomRequestHandler)
+        self.state = state or SimulatorState()
+        self.verbose = verbose
+        self.scheme = "http"
+        self.ssl_context = None
+        if certfile:
+            self.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.ssl_context.load_cert_chain(certfile, keyfile)
+            self.scheme = "https"
+
+    def finish_request(self, request, client_address):
+        # Handshake in the connection's own thread rather than in the accept loop.
+        if self.ssl_context:
+            request = self.ssl_context.wrap_socket(request, server_side=True)
+        super().finish_request(request, client_address)
+
+    def start(self):
+        """
+        Serve from a daemon thread and return self; call ``shutdown`` to stop.
+        """
+        threading.Thread(target=self.serve_forever, name="racom-simulator", daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of RACOM devices on the loopback network.")
+    parser.add_argument("--bind", default="", help="Address to listen on (default: all, covering 127.0.0.0/8).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- seconds added to the latency.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500.")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests held for --hang seconds.")
+    parser.add_argument("--hang", type=float, default=DEFAULT_HANG)
+    parser.add_argument("--reboot-delay", type=float, default=DEFAULT_REBOOT_DELAY,
+                        help="Seconds after settings_save_init until settings_save_reconnect succeeds.")
+    parser.add_argument("--no-partial-saves", dest="partial_saves", action="store_false",
+                        help="Reject partial settings_save_init calls like older firmware.")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    state = SimulatorState(args.latency, args.jitter, args.failure_rate, args.timeout_rate, args.hang,
+                           args.reboot_delay, args.seed, args.partial_saves)
+    server = RacomSimulator((args.bind, args.port), state, args.certfile, args.keyfile, args.verbose)
+    print(f"Serving RACOM devices over {server.scheme} on port {args.port}; e.g. {device_address(0)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Buffered job logging for jobs that emit one log line per device or output line.
+
+``self.logger`` writes one JobLogEntry row per call; BufferedJobLog collects the
+entries and writes them with ``bulk_create`` once ``flush_size`` entries are
+pending or ``flush_interval`` seconds have passed. Messages are sanitized the same
+way ``self.logger`` does before they are stored.
+"""
+import time
+
+from nautobot.extras.choices import LogLevelChoices
+from nautobot.core.utils.logging import sanitize
+from django.db import DEFAULT_DB_ALIAS
+from nautobot.extras.models import JobLogEntry
+from nautobot.extras.models.jobs import JOB_LOGS
+
+DEFAULT_FLUSH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 5
+
+VERBOSITY_ALL = "all"
+VERBOSITY_FAILURES = "failures"
+VERBOSITY_CHOICES = (
+    (VERBOSITY_ALL, "All messages"),
+    (VERBOSITY_FAILURES, "Failures and summary only"),
+)
+
+
+class BufferedJobLog:
+    """
+    Logger-like sink that bulk-writes JobLogEntry rows for ``job``'s JobResult.
+
+    With ``verbosity="failures"`` debug, info and success messages are dropped; use
+    ``summary`` for the messages that must always be kept. Use as a context manager,
+    or call ``flush`` when done.
+    """
+
+    def __init__(self, job, verbosity=VERBOSITY_ALL, flush_size=DEFAULT_FLUSH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, grouping="run"):
+        self.job_result = job.job_result
+        self.verbosity = verbosity
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.grouping = grouping
+        self._entries = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def _log(self, level, message):
+        self._entries.append(
+            JobLogEntry(job_result=self.job_result, log_level=level, grouping=self.grouping, message=sanitize(str(message)))
+        )
+        if len(self._entries) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._entries:
+            # Same connection JobResult.log uses, so entries show up while the job runs and
+            # survive a rollback of the job's own transaction.
+            using = JOB_LOGS if getattr(self.job_result, "use_job_logs_db", True) else DEFAULT_DB_ALIAS
+            JobLogEntry.objects.using(using).bulk_create(self._entries, batch_size=self.flush_size)
+            self._entries = []
+        self._last_flush = time.monotonic()
+
+    def _verbose(self):
+        return self.verbosity != VERBOSITY_FAILURES
+
+    def debug(self, message):
+        if self._verbose():
+            self._log(LogLevelChoices.LOG_DEBUG, message)
+
+    def info(self, message):
+        if self._verbose():
+            self._log(LogLevelChoices.LOG_INFO, message)
+
+    def success(self, message):
+        if self._verbose():
+            self._log(LogLevelChoices.LOG_SUCCESS, message)
+
+    def warning(self, message):
+        self._log(LogLevelChoices.LOG_WARNING, message)
+
+    def failure(self, message):
+        self._log(LogLevelChoices.LOG_FAILURE, message)
+
+    def error(self, message):
+        self._log(LogLevelChoices.LOG_ERROR, message)
+
+    def summary(self, message):
+        """
+        Log ``message`` at info level regardless of verbosity.
+        """
+        self._log(LogLevelChoices.LOG_INFO, message)
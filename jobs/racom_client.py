@@ -0,0 +1,211 @@
+"""
+Pooled RACOM RPC client shared by the RACOM jobs.
+
+All calls go through one keep-alive ``requests.Session`` whose adapter keeps idle
+connections for at most MAX_POOLS devices, closing the least recently used ones,
+so repeated calls to a device reuse its TCP+TLS connection without a fleet sweep
+holding one socket per device. One-shot liveness pings do not keep their
+connection at all. Login tokens live in the Django cache per domain, so every
+worker and job run shares them until they expire or the device answers 401.
+"""
+import os
+import threading
+
+import requests
+from django.core.cache import cache
+
+from .racom_health import CircuitBreaker
+from .racom_scheduling import PRIORITY_BULK, acquire
+from .timed_http import TimedHTTPAdapter
+from .timing import measure
+
+DEFAULT_USERNAME = "admin"
+DEFAULT_PASSWORD = "admin"
+DEFAULT_TIMEOUT = 10
+DEFAULT_TOKEN_TTL = 300
+# Connections kept open per device; a single radio rarely sees more than a few calls at once.
+POOL_MAXSIZE = 4
+# Devices whose idle connections are kept; older ones are closed when another device is contacted.
+MAX_POOLS = 64
+# Overridable so the jobs can be pointed at benchmarks/racom_simulator.py instead of real radios.
+RACOM_SCHEME = os.environ.get("RACOM_SCHEME", "https")
+RACOM_PORT = int(os.environ.get("RACOM_PORT", "443"))
+
+
+class RacomError(Exception):
+    """
+    Raised when a RACOM device cannot be reached or rejects a call.
+    """
+
+
+class CircuitOpenError(RacomError):
+    """
+    Raised without contacting the device while its domain's circuit is open.
+    """
+
+
+class RacomClient:
+    """
+    Thread-safe client for the RACOM ``login.cgi`` / ``rpc.cgi`` API.
+    """
+
+    def __init__(self, username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD, timeout=DEFAULT_TIMEOUT,
+                 token_ttl=DEFAULT_TOKEN_TTL):
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.token_ttl = token_ttl
+        self._session_obj = None
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker()
+
+    def _session(self):
+        with self._lock:
+            if self._session_obj is None:
+                session = requests.Session()
+                session.mount(
+                    f"{RACOM_SCHEME}://", TimedHTTPAdapter(pool_connections=MAX_POOLS, pool_maxsize=POOL_MAXSIZE)
+                )
+                session.headers["Content-Type"] = "application/json"
+                self._session_obj = session
+            return self._session_obj
+
+    @staticmethod
+    def _token_key(domain):
+        return f"racom:token:{domain}"
+
+    @staticmethod
+    def _url(domain, script):
+        return f"{RACOM_SCHEME}://{domain}:{RACOM_PORT}/cgi-bin/{script}"
+
+    def _post(self, domain, script, payload, headers=None, timeout=None, priority=PRIORITY_BULK):
+        allowed, state = self.breaker.allow(domain)
+        if not allowed:
+            raise CircuitOpenError(
+                f"Circuit open for {domain} after {state['failures']} consecutive failures; "
+                f"next probe in {self.breaker.retry_in(state)}s"
+            )
+        acquire(priority)
+        phase = "login" if script == "login.cgi" else f"rpc:{payload['method']}"
+        try:
+            with measure(phase):
+                resp = self._session().post(
+                    self._url(domain, script),
+                    json=payload,
+                    headers=headers,
+                    # Disable SSL verification for self-signed certs. Passed per request because
+                    # REQUESTS_CA_BUNDLE in the environment would override a session-level setting.
+                    verify=False,
+                    timeout=timeout or self.timeout,
+                )
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure(domain, state)
+            raise
+        self.breaker.record_success(domain)
+        return resp
+
+    def login(self, domain, force=False, timeout=None, priority=PRIORITY_BULK):
+        """
+        Return an API token for ``domain``, logging in only if no unexpired token is cached.
+        """
+        if not force:
+            token = cache.get(self._token_key(domain))
+            if token:
+                return token
+        payload = {"username": self.username, "password": self.password, "language_code": "en"}
+        resp = self._post(domain, "login.cgi", payload, timeout=timeout, priority=priority)
+        if resp.status_code != 200:
+            raise RacomError(f"Could not login to device at {domain}")
+        token = resp.json().get("token")
+        if not token:
+            raise RacomError(f"No token returned from device at {domain}")
+        cache.set(self._token_key(domain), token, timeout=self.token_ttl)
+        return token
+
+    def forget_token(self, domain):
+        cache.delete(self._token_key(domain))
+
+    def rpc(self, domain, method, params=None, authenticated=True, timeout=None, priority=PRIORITY_BULK):
+        """
+        Call ``method`` on the device's ``rpc.cgi`` and return the raw response.
+
+        Authenticated calls log in on demand and retry once with a fresh token if
+        the cached one was rejected with HTTP 401. ``priority`` is the
+        racom_scheduling lane the calls wait in.
+        """
+        payload = {"method": method}
+        if params is not None:
+            payload["params"] = params
+        if not authenticated:
+            # Unauthenticated calls are one-shot checks; do not keep their connection open.
+            return self._post(domain, "rpc.cgi", payload, headers={"Connection": "close"}, timeout=timeout,
+                              priority=priority)
+        token = self.login(domain, timeout=timeout, priority=priority)
+        resp = self._post(domain, "rpc.cgi", payload, headers={"apikey": token}, timeout=timeout, priority=priority)
+        if resp.status_code == 401:
+            token = self.login(domain, force=True, timeout=timeout, priority=priority)
+            resp = self._post(domain, "rpc.cgi", payload, headers={"apikey": token}, timeout=timeout, priority=priority)
+        return resp
+
+    def device_ping(self, domain, timeout=None, priority=PRIORITY_BULK):
+        """
+        Unauthenticated liveness check; returns the raw response.
+        """
+        return self.rpc(domain, "device_ping", authenticated=False, timeout=timeout, priority=priority)
+
+    def settings_get(self, domain, timeout=None):
+        """
+        Return the device's ``config_data`` dictionary.
+        """
+        resp = self.rpc(domain, "settings_get", timeout=timeout)
+        if resp.status_code != 200:
+            raise RacomError(f"Could not retrieve config from device at {domain}")
+        try:
+            return resp.json()["result"]["config_data"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise RacomError(f"Unexpected settings_get response from device at {domain}: {e}")
+
+    def settings_save_init(self, domain, config_data, partial=False, timeout=None):
+        """
+        Start saving ``config_data`` on the device and return the RPC ``result`` dictionary.
+
+        With ``partial`` the device is asked to merge ``config_data`` into its current
+        settings rather than replace them; firmware without partial saves answers with an
+        error. The result carries the ``session_id`` and polling ``interval`` used by
+        settings_save_reconnect while the device applies the new settings.
+        """
+        params = {"config_data": config_data}
+        if partial:
+            params["partial"] = True
+        resp = self.rpc(domain, "settings_save_init", params=params, timeout=timeout)
+        if resp.status_code != 200:
+            raise RacomError(f"Failed to deploy updated config to device at {domain}")
+        try:
+            return resp.json().get("result") or {}
+        except ValueError:
+            return {}
+
+    def settings_save_reconnect(self, domain, session_id, timeout=None):
+        """
+        Return True once the device is back after a settings save.
+        """
+        resp = self.rpc(domain, "settings_save_reconnect", params={"session_id": session_id}, timeout=timeout)
+        return resp.status_code == 200
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the RacomClient shared by all threads of the running job.
+
+    Nautobot re-imports the repository's modules for every job run, so the client and
+    its connections last for one run; login tokens are in the Django cache and outlive it.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RacomClient()
+        return _client
@@ -1,13 +1,138 @@
-import requests
-from nautobot.apps.jobs import JobHookReceiver
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from nautobot.apps.jobs import Job, JobHookReceiver, IntegerVar, StringVar
 from nautobot.apps import jobs
 from nautobot.dcim.models import Device
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.models import ObjectChange
+
+from .racom_client import get_client
+from .racom_enqueue import JobNotEnabledError, enqueue_job
+from .racom_reconnect import schedule_reconnect_check, schedule_reconnect_checks
+from .racom_snapshots import ConfigSnapshotStore, supports_partial_save
+from .racom_sync import LogRecorder, sync_station_name
+from .timing import job_timing
+
+# Dotted paths into the ObjectChange snapshots; only edits touching one of these need a device check.
+WATCHED_FIELDS = ("name", "custom_fields.Domain")
+
+
+def _snapshot_value(snapshot, path):
+    value = snapshot
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def relevant_fields_changed(change, watched_fields=WATCHED_FIELDS):
+    """
+    Return True if ``change`` touched any of ``watched_fields``.
+
+    Changes without both a pre- and post-change snapshot (creates, or records
+    Nautobot cannot diff) are always treated as relevant.
+    """
+    try:
+        snapshots = change.get_snapshots()
+    except Exception:
+        return True
+    prechange = snapshots.get("prechange")
+    postchange = snapshots.get("postchange")
+    if not prechange or not postchange:
+        return True
+    return any(_snapshot_value(prechange, path) != _snapshot_value(postchange, path) for path in watched_fields)
+
+
+BATCH_SCHEDULED_KEY = "racom:device-change-batch:scheduled"
+DEFAULT_BATCH_CONCURRENCY = 16
+# Seconds to collect change events before handing them to one RacomDeviceChangeBatch run;
+# 0 processes every event inline.
+COALESCE_WINDOW = int(os.environ.get("RACOM_HOOK_COALESCE_WINDOW", "0"))
+
+
+class RacomDeviceChangeBatch(Job):
+    """
+    Process all Device changes recorded since ``since`` in one run, once per device.
+    """
+    class Meta:
+        name = "Racom Device Change Batch"
+        description = "Coalesced processing of Device change events queued by the Racom Device Change Hook."
+        commit_default = False
+        hidden = True
+
+    since = StringVar(
+        description="ISO timestamp; Device changes recorded after this are processed."
+    )
+    max_concurrency = IntegerVar(
+        default=DEFAULT_BATCH_CONCURRENCY,
+        min_value=1,
+        description="Maximum number of devices processed in parallel."
+    )
+
+    def run(self, *, since, max_concurrency=DEFAULT_BATCH_CONCURRENCY):
+        changes = ObjectChange.objects.filter(
+            changed_object_type=ContentType.objects.get_for_model(Device),
+            action__in=[ObjectChangeActionChoices.ACTION_CREATE, ObjectChangeActionChoices.ACTION_UPDATE],
+            time__gte=parse_datetime(since),
+            time__lte=timezone.now(),
+        )
+        # Several events for one device collapse into a single check against its current state.
+        device_pks = {
+            change.changed_object_id
+            for change in changes.iterator()
+            if relevant_fields_changed(change, RacomDeviceChangeHook.watched_fields)
+        }
+        devices = Device.objects.filter(pk__in=device_pks).select_related("software_version")
+        self.logger.info(f"Processing {len(device_pks)} changed device(s) recorded since {since}.")
+
+        snapshots = ConfigSnapshotStore(get_client())
+        success_count = 0
+        fail_count = 0
+        deploy_results = []
+        with job_timing(self), ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = []
+            for device in devices:
+                domain = device.custom_field_data.get("Domain")
+                if not domain:
+                    self.logger.warning(f"Device {device} has no Domain custom field; skipping config check.")
+                    continue
+                recorder = LogRecorder()
+                futures.append((domain, recorder, executor.submit(
+                    sync_station_name, snapshots, device.pk, device.name, domain, recorder,
+                    partial=supports_partial_save(device),
+                )))
+            for domain, recorder, future in futures:
+                try:
+                    deploy_result = future.result()
+                    success_count += 1
+                except Exception:
+                    deploy_result = None
+                    fail_count += 1
+                recorder.replay(self.logger)
+                deploy_results.append((domain, deploy_result))
+        # One check job follows every device this run redeployed.
+        schedule_reconnect_checks(self.user, deploy_results, self.logger)
+
+        summary = f"Processed {success_count + fail_count} device(s): {success_count} successful, {fail_count} failed."
+        self.logger.info(summary)
+        return summary
+
 
 class RacomDeviceChangeHook(JobHookReceiver):
     class Meta:
         name = "Racom Device Change Hook"
         description = "Triggered on Device create/update/delete events."
 
+    watched_fields = WATCHED_FIELDS
+    coalesce_window = COALESCE_WINDOW
+
     def receive_job_hook(self, change, action, changed_object):
         """
         This method is called when a Device is created, updated, or deleted.
@@ -21,103 +146,43 @@ class RacomDeviceChangeHook(JobHookReceiver):
         )
         # On device create/update, fetch config and compare names
         if action in ("create", "update") and changed_object is not None:
+            if action == "update" and not relevant_fields_changed(change, self.watched_fields):
+                self.logger.info(f"Device {changed_object}: none of {', '.join(self.watched_fields)} changed; skipping config check.")
+                return
             nautobot_name = changed_object.name
             domain = changed_object.custom_field_data.get("Domain")
             if not domain:
                 self.logger.warning(f"Device {changed_object} has no Domain custom field; skipping config check.")
                 return
-            # --- RACOM login ---
-            login_url = f"https://{domain}:443/cgi-bin/login.cgi"
-            login_payload = {"username": "admin", "password": "admin", "language_code": "en"}
-            try:
-                login_resp = requests.post(login_url, json=login_payload, headers={"Content-Type": "application/json"}, verify=False, timeout=10)
-                if not login_resp or login_resp.status_code != 200:
-                    self.logger.error(f"Could not login to device at {domain}")
-                    raise Exception(f"Could not login to device at {domain}")
-                token = login_resp.json().get("token")
-                if not token:
-                    self.logger.error(f"No token returned from device at {domain}")
-                    raise Exception(f"No token returned from device at {domain}")
-            except Exception as e:
-                self.logger.error(f"Exception during login to {domain}: {e}")
-                raise
-            # --- Get config ---
-            config_url = f"https://{domain}:443/cgi-bin/rpc.cgi"
-            config_payload = {"method": "settings_get"}
-            config_headers = {"Content-Type": "application/json", "apikey": token}
-            try:
-                config_resp = requests.post(config_url, json=config_payload, headers=config_headers, verify=False, timeout=10)
-                if not config_resp or config_resp.status_code != 200:
-                    self.logger.error(f"Could not retrieve config from device at {domain}")
-                    raise Exception(f"Could not retrieve config from device at {domain}")
-                config_json = config_resp.json()
-                config_name = config_json["result"]["config_data"]["main"]["RR_StationName"]
-            except Exception as e:
-                self.logger.error(f"Could not extract station name from config: {e}")
-                raise Exception(f"Could not extract station name from config: {e}")
-            # --- Compare names and update if needed ---
-            if nautobot_name != config_name:
-                msg = f"Device name mismatch: Nautobot='{nautobot_name}' vs DeviceConfig='{config_name}'. Updating device config..."
-                self.logger.warning(msg)
-                # Update the config with the Nautobot name
-                config_json["result"]["config_data"]["main"]["RR_StationName"] = nautobot_name
-                # Deploy updated config
-                deploy_payload = {
-                    "method": "settings_save_init",
-                    "params": {"config_data": config_json["result"]["config_data"]}
-                }
-                try:
-                    deploy_resp = requests.post(
-                        config_url,
-                        json=deploy_payload,
-                        headers=config_headers,
-                        verify=False,
-                        timeout=10
-                    )
-                    if not deploy_resp or deploy_resp.status_code != 200:
-                        self.logger.error(f"Failed to deploy updated config to device at {domain}")
-                        raise Exception(f"Failed to deploy updated config to device at {domain}")
-                    self.logger.info(f"Successfully updated device config name to '{nautobot_name}' on device at {domain}")
-                    # --- Wait for reconnect (settings_save_reconnect) ---
-                    try:
-                        deploy_json = deploy_resp.json()
-                        session_id = deploy_json.get("result", {}).get("session_id")
-                        interval = deploy_json.get("result", {}).get("interval", 2)
-                        if session_id:
-                            reconnect_payload = {
-                                "method": "settings_save_reconnect",
-                                "params": {"session_id": session_id}
-                            }
-                            for attempt in range(30):
-                                try:
-                                    reconnect_resp = requests.post(
-                                        config_url,
-                                        json=reconnect_payload,
-                                        headers=config_headers,
-                                        verify=False,
-                                        timeout=10
-                                    )
-                                    if reconnect_resp and reconnect_resp.status_code == 200:
-                                        self.logger.info(f"[RECONNECT] {domain}: Success")
-                                        break
-                                    else:
-                                        self.logger.info(f"[RECONNECT] {domain}: Waiting ({attempt+1}/30)...")
-                                        import time
-                                        time.sleep(interval)
-                                except Exception as e:
-                                    self.logger.error(f"[RECONNECT] {domain}: Exception during reconnect: {e}")
-                                    import time
-                                    time.sleep(interval)
-                            else:
-                                self.logger.error(f"[RECONNECT] {domain}: Failed after retries")
-                    except Exception as e:
-                        self.logger.error(f"Exception during reconnect wait: {e}")
-                except Exception as e:
-                    self.logger.error(f"Exception during config deployment: {e}")
-                    raise Exception(f"Exception during config deployment: {e}")
-            else:
-                self.logger.info(f"Device name matches: '{nautobot_name}'")
+            if self.coalesce_window and self._schedule_batch(change):
+                return
+            with job_timing(self):
+                deploy_result = sync_station_name(
+                    ConfigSnapshotStore(get_client()), changed_object.pk, nautobot_name, domain, self.logger,
+                    partial=supports_partial_save(changed_object),
+                )
+            schedule_reconnect_check(self.user, domain, deploy_result, self.logger)
         elif action == "delete":
             self.logger.info(f"Device {changed_object} was deleted. No ping attempted.")
 
-jobs.register_jobs(RacomDeviceChangeHook)
+    def _schedule_batch(self, change):
+        """
+        Queue a batch run for this window unless one is already pending.
+
+        Returns False if the batch job cannot be queued, so the change is processed inline.
+        """
+        # Start one window early so changes whose hook ran out of order are still covered.
+        since = change.time - timedelta(seconds=self.coalesce_window)
+        if cache.add(BATCH_SCHEDULED_KEY, since.isoformat(), timeout=self.coalesce_window):
+            try:
+                enqueue_job(RacomDeviceChangeBatch, self.user, countdown=self.coalesce_window, since=since.isoformat())
+            except JobNotEnabledError as e:
+                cache.delete(BATCH_SCHEDULED_KEY)
+                self.logger.warning(f"{e} Checking this device inline instead.")
+                return False
+            self.logger.info(f"Scheduled coalesced device check in {self.coalesce_window}s.")
+        else:
+            self.logger.info("Coalesced into the already scheduled device check.")
+        return True
+
+jobs.register_jobs(RacomDeviceChangeHook, RacomDeviceChangeBatch)
@@ -0,0 +1,92 @@
+"""
+Lean device selection for the RACOM jobs.
+
+Only the columns the jobs need are fetched and rows are streamed in chunks, so
+memory stays flat regardless of fleet size.
+"""
+import math
+
+from django.db.models import Count
+
+DOMAIN_LOOKUP = "_custom_field_data__Domain"
+DEFAULT_CHUNK_SIZE = 2000
+
+SHARD_BY_PK = "pk"
+SHARD_BY_LOCATION = "location"
+SHARD_BY_DEVICE_TYPE = "device_type"
+SHARD_BY_CHOICES = (
+    (SHARD_BY_PK, "Primary key range"),
+    (SHARD_BY_LOCATION, "Location"),
+    (SHARD_BY_DEVICE_TYPE, "Device type"),
+)
+
+
+def with_domain(devices):
+    """
+    Narrow a Device queryset to devices whose Domain custom field is set and non-empty.
+    """
+    return (
+        devices.exclude(**{f"{DOMAIN_LOOKUP}__isnull": True})
+        .exclude(**{DOMAIN_LOOKUP: None})
+        .exclude(**{DOMAIN_LOOKUP: ""})
+    )
+
+
+def iter_targets(devices, chunk_size=DEFAULT_CHUNK_SIZE, fields=()):
+    """
+    Stream ``(pk, name, domain, *fields)`` tuples for the devices in ``devices`` that have a Domain.
+
+    ``fields`` are further Device field lookups whose values are appended to each tuple.
+    """
+    return (
+        with_domain(devices)
+        .order_by()
+        .values_list("pk", "name", DOMAIN_LOOKUP, *fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def shard_filters(devices, shard_count, shard_by=SHARD_BY_PK):
+    """
+    Split the devices in ``devices`` that have a Domain into at most ``shard_count`` shards.
+
+    Returns one JSON-serializable dict of Device filter kwargs per non-empty shard; applied
+    on top of ``devices`` the shards are disjoint and together cover every device. pk shards
+    are contiguous pk ranges of equal size, location and device type shards are whole
+    locations or device types, balanced by device count.
+    """
+    devices = with_domain(devices).order_by()
+    if shard_by == SHARD_BY_PK:
+        return _pk_ranges(devices, shard_count)
+    return _balanced_groups(devices, shard_by, shard_count)
+
+
+def _pk_ranges(devices, shard_count):
+    total = devices.count()
+    if not total:
+        return []
+    pks = devices.order_by("pk").values_list("pk", flat=True)
+    size = math.ceil(total / shard_count)
+    bounds = [None] + [str(pks[offset]) for offset in range(size, total, size)] + [None]
+    filters = []
+    for lower, upper in zip(bounds, bounds[1:]):
+        shard = {}
+        if lower is not None:
+            shard["pk__gte"] = lower
+        if upper is not None:
+            shard["pk__lt"] = upper
+        filters.append(shard)
+    return filters
+
+
+def _balanced_groups(devices, field, shard_count):
+    groups = devices.values_list(field).annotate(count=Count("pk")).order_by("-count")
+    shards = []
+    for key, count in groups:
+        # Largest groups first, each into the currently smallest shard.
+        if len(shards) < shard_count:
+            shards.append([0, []])
+        shard = min(shards, key=lambda s: s[0])
+        shard[0] += count
+        shard[1].append(str(key))
+    return [{f"{field}__in": keys} for _, keys in shards]
@@ -0,0 +1,136 @@
+from nautobot.apps.jobs import Job, ObjectVar, BooleanVar, IntegerVar
+from nautobot.apps import jobs
+from nautobot.dcim.models import Device, DeviceType, Location
+
+from .job_logging import BufferedJobLog
+from .racom_client import get_client
+from .racom_devices import iter_targets
+from .racom_engine import DEFAULT_DEADLINE, DEFAULT_MAX_CONCURRENCY, run_concurrently
+from .racom_reconnect import schedule_reconnect_checks
+from .racom_snapshots import ConfigSnapshotStore, supports_partial_save
+from .racom_sync import DRIFT_LOOKUPS, apply_drift, expected_config, find_drift
+from .timing import job_timing
+
+DEFAULT_DEPLOY_CONCURRENCY = 8
+
+
+class RacomConfigDriftAudit(Job):
+    """
+    Compare RACOM device configs with Nautobot across the fleet and optionally fix drifted devices.
+    """
+    class Meta:
+        name = "Racom Config Drift Audit"
+        description = "Fetch settings_get from RACOM devices concurrently, report config drift against Nautobot and optionally deploy to drifted devices."
+        commit_default = False
+
+    device_type = ObjectVar(
+        model=DeviceType,
+        required=False,
+        description="Only audit devices of this Device Type (optional)."
+    )
+    location = ObjectVar(
+        model=Location,
+        required=False,
+        description="Only audit devices at this Location (optional)."
+    )
+    deploy = BooleanVar(
+        default=False,
+        description="Deploy the Nautobot values to devices that drifted."
+    )
+    max_concurrency = IntegerVar(
+        default=DEFAULT_MAX_CONCURRENCY,
+        min_value=1,
+        description="Maximum number of devices audited in parallel."
+    )
+    deploy_concurrency = IntegerVar(
+        default=DEFAULT_DEPLOY_CONCURRENCY,
+        min_value=1,
+        description="Maximum number of config deploys in parallel."
+    )
+    snapshot_max_age = IntegerVar(
+        default=0,
+        min_value=0,
+        description="Audit against cached device configs younger than this many seconds; 0 always fetches. Deploys re-read configs that came from the cache."
+    )
+    job_deadline = IntegerVar(
+        default=DEFAULT_DEADLINE,
+        min_value=1,
+        description="Time budget in seconds for each of the audit and deploy phases."
+    )
+    timing_file = BooleanVar(
+        default=False,
+        description="Attach per-phase call timings as a Prometheus text file."
+    )
+
+    def run(self, *, device_type=None, location=None, deploy=False, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+            deploy_concurrency=DEFAULT_DEPLOY_CONCURRENCY, snapshot_max_age=0, job_deadline=DEFAULT_DEADLINE,
+            timing_file=False):
+        with job_timing(self, prometheus_file=timing_file), BufferedJobLog(self) as log:
+            devices = Device.objects.all()
+            if device_type:
+                devices = devices.filter(device_type=device_type)
+            if location:
+                devices = devices.filter(location=location)
+
+            snapshots = ConfigSnapshotStore(get_client(), max_age=snapshot_max_age)
+            checked_count = 0
+            error_count = 0
+            drifted = []
+
+            def fetch(target):
+                return snapshots.fetch_snapshot(target[0], target[2])
+
+            targets = iter_targets(devices, fields=DRIFT_LOOKUPS)
+            for target, snapshot, error in run_concurrently(fetch, targets, max_concurrency, job_deadline):
+                pk, name, domain, *values = target
+                checked_count += 1
+                if error is not None:
+                    log.error(f"{name} ({domain}): Could not retrieve config: {error}")
+                    error_count += 1
+                    continue
+                drift = find_drift(snapshot["config"], expected_config(dict(zip(DRIFT_LOOKUPS, values))))
+                if drift:
+                    for section, key, current, value in drift:
+                        log.warning(f"{name} ({domain}): {section}.{key} is '{current}', Nautobot expects '{value}'.")
+                    drifted.append((pk, name, domain, snapshot, drift))
+
+            no_domain_count = devices.count() - checked_count
+            if no_domain_count:
+                log.warning(f"Skipped {no_domain_count} device(s) without a Domain custom field.")
+            summary = f"Audited {checked_count} devices: {len(drifted)} drifted, {error_count} could not be read."
+            log.summary(summary)
+            if not deploy or not drifted:
+                return summary
+
+            # Only drifted devices need their firmware version, so it is read for them alone.
+            partial_pks = {
+                device.pk
+                for device in Device.objects.filter(pk__in=[item[0] for item in drifted]).select_related("software_version")
+                if supports_partial_save(device)
+            }
+
+            def deploy_one(item):
+                pk, _, domain, snapshot, drift = item
+                return snapshots.deploy(
+                    pk, domain, lambda config_data: apply_drift(config_data, drift), snapshot=snapshot,
+                    partial=pk in partial_pks,
+                )
+
+            deploy_results = []
+            for (_, name, domain, _, _), deploy_result, error in run_concurrently(deploy_one, drifted, deploy_concurrency, job_deadline):
+                if error is not None:
+                    log.error(f"{name} ({domain}): Exception during config deployment: {error}")
+                    continue
+                if deploy_result is None:
+                    log.info(f"{name} ({domain}): Device already has the Nautobot values; skipped.")
+                    continue
+                deploy_results.append((domain, deploy_result))
+                log.info(f"{name} ({domain}): Deployed Nautobot values.")
+            # A single check job follows every redeployed device instead of one chain per device.
+            schedule_reconnect_checks(self.user, deploy_results, log)
+
+            summary += f" Deployed to {len(deploy_results)} of {len(drifted)} drifted devices."
+            log.summary(summary)
+            return summary
+
+jobs.register_jobs(RacomConfigDriftAudit)
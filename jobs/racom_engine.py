@@ -0,0 +1,230 @@
+"""
+Concurrent execution engine shared by the RACOM jobs.
+"""
+import socket
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from .racom_client import RACOM_PORT, CircuitOpenError, get_client
+from .racom_scheduling import PRIORITY_BULK
+from .timing import cached_dns, record, resolve
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_TIMEOUT = 10
+# Stay below Celery's default 300 second soft time limit for jobs.
+DEFAULT_DEADLINE = 240
+DEFAULT_TCP_TIMEOUT = 2
+# TCP connects are cheap, so the pre-probe sweep runs this many times wider than the RPC pings.
+TCP_CONCURRENCY_FACTOR = 4
+
+PROBE_RPC = "rpc"
+PROBE_TIERED = "tiered"
+PROBE_TCP = "tcp"
+PROBE_MODE_CHOICES = (
+    (PROBE_RPC, "RPC device_ping"),
+    (PROBE_TIERED, "TCP pre-probe, then RPC device_ping for reachable devices"),
+    (PROBE_TCP, "TCP connect only"),
+)
+
+_EXHAUSTED = object()
+
+# error_class values for failed pings
+ERROR_NETWORK = "network"
+ERROR_HTTP = "http"
+ERROR_REQUEST = "request"
+ERROR_CIRCUIT_OPEN = "circuit_open"
+ERROR_DEADLINE = "deadline"
+ERROR_EXCEPTION = "exception"
+
+PingResult = namedtuple(
+    "PingResult", ["pk", "name", "domain", "ok", "status_code", "error", "detail", "error_class", "latency"]
+)
+# latency is the probe's duration in seconds, or None if it never ran.
+PingResult.__new__.__defaults__ = (None,)
+
+
+def _ping_target(pk, name, domain, timeout, priority=PRIORITY_BULK):
+    """
+    Send a single device_ping RPC and turn the outcome into a PingResult.
+    """
+    started = time.monotonic()
+    try:
+        resp = get_client().device_ping(domain, timeout=timeout, priority=priority)
+    except CircuitOpenError as e:
+        return PingResult(pk, name, domain, False, None, f"Skipped: {e}", "", ERROR_CIRCUIT_OPEN)
+    except requests.exceptions.RequestException as e:
+        latency = time.monotonic() - started
+        return PingResult(pk, name, domain, False, None, f"Request Exception: {e}", "", ERROR_REQUEST, latency)
+    except Exception as e:  # Generic exception
+        latency = time.monotonic() - started
+        return PingResult(pk, name, domain, False, None, f"Generic Exception during ping: {e}", "", ERROR_EXCEPTION, latency)
+    latency = time.monotonic() - started
+    if resp.status_code == 200:
+        return PingResult(pk, name, domain, True, resp.status_code, None, "", None, latency)
+    return PingResult(pk, name, domain, False, resp.status_code, None, resp.text[:200], ERROR_HTTP, latency)
+
+
+def _tcp_connect(addresses, timeout):
+    """
+    Open and close a TCP connection to the first of ``addresses`` that accepts one, raising the last error if none does.
+    """
+    for address in addresses[:-1]:
+        try:
+            with socket.create_connection((address, RACOM_PORT), timeout=timeout):
+                return
+        except OSError:
+            continue
+    with socket.create_connection((addresses[-1], RACOM_PORT), timeout=timeout):
+        pass
+
+
+def _tcp_probe_target(pk, name, domain, timeout):
+    """
+    Try a TCP connect to the device's HTTPS port and turn the outcome into a PingResult.
+    """
+    started = time.monotonic()
+    try:
+        _tcp_connect(resolve(domain, RACOM_PORT), timeout)
+    except OSError as e:
+        record("tcp_probe", time.monotonic() - started)
+        return PingResult(
+            pk, name, domain, False, None, f"Network down: TCP connect to port {RACOM_PORT} failed: {e}", "",
+            ERROR_NETWORK, time.monotonic() - started,
+        )
+    record("tcp_probe", time.monotonic() - started)
+    return PingResult(pk, name, domain, True, None, None, "", None, time.monotonic() - started)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised in place of a result for work that had not finished by the job deadline.
+    """
+
+
+def run_concurrently(func, items, max_concurrency=DEFAULT_MAX_CONCURRENCY, deadline=DEFAULT_DEADLINE):
+    """
+    Call ``func(item)`` for each item on a bounded thread pool, yielding ``(item, result, error)`` as each finishes.
+
+    At most ``max_concurrency`` calls are in flight at once and ``items`` is consumed
+    lazily, so it may be a generator. ``error`` is the exception raised by ``func``, if
+    any; items that have not finished once ``deadline`` seconds have elapsed are yielded
+    with a DeadlineExceeded error instead of being waited for.
+    """
+    max_concurrency = max(1, max_concurrency)
+    started = time.monotonic()
+    items = iter(items)
+    pending = {}
+    exhausted = False
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        while True:
+            # Checked before refilling so nothing new is sent once the deadline has passed.
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            while not exhausted and len(pending) < max_concurrency:
+                item = next(items, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    exhausted = True
+                    break
+                pending[executor.submit(func, item)] = item
+            if not pending:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, None if error else future.result(), error
+    finally:
+        # Calls still running are bounded by their own request timeouts.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    error = DeadlineExceeded(f"Job deadline of {deadline}s exceeded")
+    for item in pending.values():
+        yield item, None, error
+    for item in items:
+        yield item, None, error
+
+
+def normalize_domain(domain):
+    """
+    Return the form of ``domain`` used to tell whether two devices share an endpoint.
+    """
+    return domain.strip().lower().rstrip(".")
+
+
+def _run_probe(probe, targets, max_concurrency, deadline):
+    """
+    Run ``probe`` once per unique normalized domain and yield a PingResult for every target.
+
+    Targets sharing a domain with one already probed or in flight wait for that result
+    instead of probing again; each gets a copy carrying its own pk, name and domain.
+    """
+    waiting = {}
+    finished = {}
+    ready = []
+
+    def unique_targets():
+        # Runs on the calling thread as run_concurrently pulls items, so no locking is needed.
+        for pk, name, domain in targets:
+            key = normalize_domain(domain)
+            if key in finished:
+                ready.append(finished[key]._replace(pk=pk, name=name, domain=domain))
+            elif key in waiting:
+                waiting[key].append((pk, name, domain))
+            else:
+                waiting[key] = [(pk, name, domain)]
+                yield pk, name, key
+
+    for (pk, name, key), result, error in run_concurrently(probe, unique_targets(), max_concurrency, deadline):
+        if error is not None:
+            result = PingResult(pk, name, key, False, None, str(error), "", ERROR_DEADLINE)
+        finished[key] = result
+        for pk, name, domain in waiting.pop(key):
+            yield result._replace(pk=pk, name=name, domain=domain)
+        while ready:
+            yield ready.pop()
+    while ready:
+        yield ready.pop()
+
+
+def ping_devices(targets, max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE,
+                 probe_mode=PROBE_RPC, tcp_timeout=DEFAULT_TCP_TIMEOUT, priority=PRIORITY_BULK):
+    """
+    Ping ``(pk, name, domain)`` targets concurrently, yielding a PingResult as each one finishes.
+
+    See run_concurrently for how concurrency and the deadline are applied; targets cut
+    off by the deadline are reported as failures. With ``probe_mode`` PROBE_TIERED every
+    target first gets a short TCP connect to the device port, hosts that do not accept it are
+    reported with ERROR_NETWORK and only the rest get the RPC ping; PROBE_TCP stops after
+    the TCP sweep. Devices sharing a Domain are probed once (see _run_probe) and DNS
+    lookups are cached until the last result has been yielded. ``priority`` is the
+    racom_scheduling lane the RPC pings wait in.
+    """
+    with cached_dns():
+        yield from _ping_devices(targets, max_concurrency, timeout, deadline, probe_mode, tcp_timeout, priority)
+
+
+def _ping_devices(targets, max_concurrency, timeout, deadline, probe_mode, tcp_timeout, priority):
+    def rpc_ping(target):
+        return _ping_target(*target, timeout, priority)
+
+    if probe_mode == PROBE_RPC:
+        yield from _run_probe(rpc_ping, targets, max_concurrency, deadline)
+        return
+
+    def tcp_probe(target):
+        return _tcp_probe_target(*target, tcp_timeout)
+
+    started = time.monotonic()
+    reachable = []
+    for result in _run_probe(tcp_probe, targets, max_concurrency * TCP_CONCURRENCY_FACTOR, deadline):
+        if probe_mode == PROBE_TCP or not result.ok:
+            yield result
+        else:
+            reachable.append((result.pk, result.name, result.domain))
+    remaining = max(0, deadline - (time.monotonic() - started))
+    yield from _run_probe(rpc_ping, reachable, max_concurrency, remaining)
@@ -0,0 +1,27 @@
+"""
+Helper for jobs that queue follow-up work as other jobs from this repository.
+"""
+from nautobot.extras.models import Job as JobModel, JobResult
+
+
+class JobNotEnabledError(Exception):
+    """
+    Raised instead of queueing a job that is not enabled in Nautobot.
+    """
+
+
+def enqueue_job(job_class, user, countdown=None, **data):
+    """
+    Queue ``job_class`` with input ``data`` and return its JobResult.
+
+    ``countdown`` delays execution by that many seconds. Nautobot installs jobs
+    disabled, hidden ones included, and a disabled job's queued run would never
+    execute, so JobNotEnabledError is raised for those instead.
+    """
+    job_model = JobModel.objects.get(module_name=job_class.__module__, job_class_name=job_class.__name__)
+    if not job_model.enabled:
+        raise JobNotEnabledError(
+            f"Job {job_model.name!r} is not enabled; enable it in Nautobot so it can be queued as a follow-up job."
+        )
+    celery_kwargs = {"countdown": countdown} if countdown else None
+    return JobResult.enqueue_job(job_model, user, celery_kwargs=celery_kwargs, **job_class.serialize_data(data))
@@ -0,0 +1,92 @@
+"""
+Per-domain circuit breaker for RACOM devices.
+
+Health state lives in the Django cache so every worker shares it. After
+FAILURE_THRESHOLD consecutive transport failures a domain's circuit opens and
+calls fail fast for the backoff window; afterwards a single probe call is let
+through, which closes the circuit on success or reopens it with a doubled
+window on failure.
+"""
+import time
+
+from django.core.cache import cache
+
+FAILURE_THRESHOLD = 3
+INITIAL_BACKOFF = 60
+MAX_BACKOFF = 3600
+# Longest a probe may take before another caller is allowed to probe.
+PROBE_TIMEOUT = 30
+# Forget a domain's failures if it has not been touched for this long.
+STATE_TTL = 24 * 60 * 60
+
+
+class CircuitBreaker:
+    """
+    Shared health state for RACOM device domains.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, initial_backoff=INITIAL_BACKOFF, max_backoff=MAX_BACKOFF):
+        self.failure_threshold = failure_threshold
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+    @staticmethod
+    def _key(domain):
+        return f"racom:circuit:{domain}"
+
+    def state(self, domain):
+        """
+        Return the domain's ``{"failures", "opened_at", "backoff"}`` state, or None if it is healthy.
+        """
+        return cache.get(self._key(domain))
+
+    def allow(self, domain):
+        """
+        Return ``(allowed, state)`` for a call to ``domain``.
+
+        While the circuit is open only one caller per backoff window is allowed
+        through as a probe.
+        """
+        state = self.state(domain)
+        if not state or not state.get("opened_at"):
+            return True, state
+        if time.time() - state["opened_at"] < state["backoff"]:
+            return False, state
+        return cache.add(f"{self._key(domain)}:probe", True, timeout=PROBE_TIMEOUT), state
+
+    def record_success(self, domain):
+        """
+        Close ``domain``'s circuit and forget its failures.
+
+        The state is re-read rather than taken from allow(), since other callers may
+        have recorded failures while this call was in flight.
+        """
+        if self.state(domain):
+            cache.delete_many([self._key(domain), f"{self._key(domain)}:probe"])
+
+    def record_failure(self, domain, state):
+        """
+        Count a failed call to ``domain``; ``state`` is what allow() returned for the call.
+
+        The count is added to the current state, re-read from the cache, so concurrent
+        failures are not lost and a success recorded meanwhile is kept; ``state`` only
+        tells whether the call was a probe.
+        """
+        probe = bool(state and state.get("opened_at"))
+        state = dict(self.state(domain) or {"failures": 0, "opened_at": None, "backoff": 0})
+        state["failures"] += 1
+        if probe and state["opened_at"]:
+            # A failed probe: stay open for twice as long.
+            state["opened_at"] = time.time()
+            state["backoff"] = min(state["backoff"] * 2, self.max_backoff)
+            cache.delete(f"{self._key(domain)}:probe")
+        elif not state["opened_at"] and state["failures"] >= self.failure_threshold:
+            state["opened_at"] = time.time()
+            state["backoff"] = self.initial_backoff
+        cache.set(self._key(domain), state, timeout=STATE_TTL)
+
+    def retry_in(self, state):
+        """
+        Seconds until an open circuit lets a probe through.
+        """
+        return max(0, int(state["opened_at"] + state["backoff"] - time.time()))
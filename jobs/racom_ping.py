@@ -1,10 +1,168 @@
-import requests
-import requests
-from nautobot.apps.jobs import Job, ObjectVar
+import gzip
+import json
+import time
+
+from django.conf import settings
+from nautobot.apps.jobs import Job, ObjectVar, IntegerVar, ChoiceVar, BooleanVar, StringVar
 from nautobot.apps import jobs
 from nautobot.dcim.models import Device, DeviceType
+from nautobot.extras.choices import JobResultStatusChoices
+from nautobot.extras.models import JobResult
+
+from .job_logging import VERBOSITY_CHOICES, VERBOSITY_FAILURES, BufferedJobLog
+from .racom_client import RACOM_PORT
+from .racom_devices import SHARD_BY_CHOICES, SHARD_BY_PK, iter_targets, shard_filters
+from .racom_engine import (
+    DEFAULT_DEADLINE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_TCP_TIMEOUT,
+    DEFAULT_TIMEOUT,
+    ERROR_CIRCUIT_OPEN,
+    ERROR_NETWORK,
+    PROBE_MODE_CHOICES,
+    PROBE_RPC,
+    PROBE_TCP,
+    PROBE_TIERED,
+    ping_devices,
+)
+from .racom_enqueue import JobNotEnabledError, enqueue_job
+from .racom_reachability import ReachabilityStore, StaleTargetFilter
+from .racom_scheduling import INTERACTIVE_QUEUE, PRIORITY_BULK, PRIORITY_INTERACTIVE
+from .racom_report import REPORT_CHOICES, REPORT_CSV, REPORT_NONE, PingReport
+from .timing import job_timing
+
+COUNT_KEYS = ("success", "failed", "circuit_open", "network_down", "skipped", "unfinished_shards")
+SHARD_POLL_INTERVAL = 5
+# Extra wait for shards that queued before starting; with the default deadline this stays below
+# Celery's 300 second soft time limit.
+SHARD_WAIT_GRACE = 30
+
+class RacomPingJobBase(Job):
+    """
+    Inputs and ping loop shared by RacomDevicePing and RacomDevicePingShard; not registered as a job.
+    """
+    max_concurrency = IntegerVar(
+        default=DEFAULT_MAX_CONCURRENCY,
+        min_value=1,
+        description="Maximum number of devices pinged in parallel."
+    )
+    ping_timeout = IntegerVar(
+        default=DEFAULT_TIMEOUT,
+        min_value=1,
+        description="Per-device request timeout in seconds."
+    )
+    job_deadline = IntegerVar(
+        default=DEFAULT_DEADLINE,
+        min_value=1,
+        description="Total time budget in seconds; devices not answered by then count as failed."
+    )
+    probe_mode = ChoiceVar(
+        choices=PROBE_MODE_CHOICES,
+        default=PROBE_RPC,
+        description="Tiered mode sweeps the device TCP port first and RPC-pings only hosts that accept the connection."
+    )
+    tcp_timeout = IntegerVar(
+        default=DEFAULT_TCP_TIMEOUT,
+        min_value=1,
+        description="TCP connect timeout in seconds for the tiered and TCP-only modes."
+    )
+    incremental_ttl = IntegerVar(
+        default=0,
+        min_value=0,
+        description="Only ping devices whose last stored result failed or is older than this many seconds; 0 pings all."
+    )
+    log_verbosity = ChoiceVar(
+        choices=VERBOSITY_CHOICES,
+        default=VERBOSITY_FAILURES,
+        description="Log every device, or only failures and the summary; the report lists every device either way."
+    )
+    report_format = ChoiceVar(
+        choices=REPORT_CHOICES,
+        default=REPORT_CSV,
+        description="Attach a per-device result report to the job result in this format."
+    )
+    timing_file = BooleanVar(
+        default=False,
+        description="Attach per-phase call timings as a Prometheus text file."
+    )
+    def _ping(self, devices, *, max_concurrency, ping_timeout, job_deadline, probe_mode, tcp_timeout,
+              incremental_ttl, log_verbosity, report_format, timing_file=False, priority=PRIORITY_BULK):
+        """
+        Ping ``devices``, log and report each result and return the counts used by _summary.
+        """
+        counts = dict.fromkeys(COUNT_KEYS, 0)
+        report = None if report_format == REPORT_NONE else PingReport(report_format)
+        targets = iter_targets(devices)
+        stale_filter = None
+        if incremental_ttl:
+            stale_filter = StaleTargetFilter(incremental_ttl, probe=PROBE_TCP if probe_mode == PROBE_TCP else PROBE_RPC)
+            targets = stale_filter.filter(targets)
+        results = ping_devices(
+            targets,
+            max_concurrency=max_concurrency,
+            timeout=ping_timeout,
+            deadline=job_deadline,
+            probe_mode=probe_mode,
+            tcp_timeout=tcp_timeout,
+            priority=priority,
+        )
+        with job_timing(self, prometheus_file=timing_file), \
+                BufferedJobLog(self, verbosity=log_verbosity) as log, ReachabilityStore() as store:
+            for result in results:
+                store.record(result, probe=PROBE_TCP if probe_mode == PROBE_TCP else PROBE_RPC)
+                if report is not None:
+                    report.record(result)
+                if result.ok and probe_mode == PROBE_TCP:
+                    log.info(f"{result.name} ({result.domain}): TCP port {RACOM_PORT} reachable.")
+                    counts["success"] += 1
+                elif result.ok:
+                    log.info(f"{result.name} ({result.domain}): API reachable.")
+                    counts["success"] += 1
+                elif result.error_class == ERROR_NETWORK:
+                    log.error(f"{result.name} ({result.domain}): {result.error}")
+                    counts["network_down"] += 1
+                    counts["failed"] += 1
+                elif result.error_class == ERROR_CIRCUIT_OPEN:
+                    log.warning(f"{result.name} ({result.domain}): {result.error}")
+                    counts["circuit_open"] += 1
+                    counts["failed"] += 1
+                elif result.error:
+                    log.error(f"{result.name} ({result.domain}): {result.error}")
+                    counts["failed"] += 1
+                else:
+                    log.error(f"{result.name} ({result.domain}): API NOT reachable. Status: {result.status_code}")
+                    counts["failed"] += 1
+        if stale_filter is not None:
+            counts["skipped"] = stale_filter.skipped
+        if report is not None:
+            report.attach(self)
+        return counts
+
+    @staticmethod
+    def _summary(counts, probe_mode, incremental_ttl):
+        success_count = counts["success"]
+        fail_count = counts["failed"]
+        skipped_note = ""
+        if counts["skipped"]:
+            skipped_note = f" Skipped {counts['skipped']} devices with a successful result from the last {incremental_ttl}s."
+        if counts["unfinished_shards"]:
+            skipped_note += f" {counts['unfinished_shards']} shard(s) did not finish; their devices are not counted."
+        if not success_count + fail_count:
+            if skipped_note:
+                return f"No devices due for a ping.{skipped_note}"
+            return "No devices with a Domain found in Nautobot."
+        summary = f"Pinged {success_count + fail_count} devices: {success_count} successful, {fail_count} failed."
+        if counts["circuit_open"]:
+            summary += f" {counts['circuit_open']} failed fast on an open circuit."
+        if probe_mode != PROBE_RPC:
+            summary += f" Network down: {counts['network_down']}."
+        if probe_mode == PROBE_TIERED:
+            summary += f" API down: {fail_count - counts['network_down']}."
+        summary += skipped_note
+        return summary
+
 
-class RacomDevicePing(Job):
+class RacomDevicePing(RacomPingJobBase):
     """
     Ping all RACOM devices in Nautobot using device_ping API call.
     """
@@ -12,6 +170,8 @@ class RacomDevicePing(Job):
         name = "Racom Device API Ping"
         description = "Ping all RACOM devices in Nautobot using device_ping API call."
         commit_default = False
+        # Sweeps use the default queue; pick the interactive one when pinging a single device.
+        task_queues = [settings.CELERY_TASK_DEFAULT_QUEUE, INTERACTIVE_QUEUE]
 
     device = ObjectVar(
         model=Device,
@@ -23,45 +183,140 @@ class RacomDevicePing(Job):
         required=False,
         description="Ping all devices of this Device Type (optional)."
     )
+    shard_count = IntegerVar(
+        default=1,
+        min_value=1,
+        description="Split the devices into this many shard jobs run by separate Celery workers; 1 pings them here."
+    )
+    shard_by = ChoiceVar(
+        choices=SHARD_BY_CHOICES,
+        default=SHARD_BY_PK,
+        description="How devices are split into shards."
+    )
 
-    def run(self, *, device=None, device_type=None, commit=None):
+    def run(self, *, device=None, device_type=None, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+            ping_timeout=DEFAULT_TIMEOUT, job_deadline=DEFAULT_DEADLINE, probe_mode=PROBE_RPC,
+            tcp_timeout=DEFAULT_TCP_TIMEOUT, incremental_ttl=0, log_verbosity=VERBOSITY_FAILURES,
+            report_format=REPORT_CSV, timing_file=False, shard_count=1, shard_by=SHARD_BY_PK, commit=None):
         # Determine which filter to use
         if device:
             devices = Device.objects.filter(pk=device.pk)
+            base_filter = {"pk": str(device.pk)}
             self.logger.info(f"Pinging single device: {device}")
         elif device_type:
             devices = Device.objects.filter(device_type=device_type)
+            base_filter = {"device_type": str(device_type.pk)}
             self.logger.info(f"Pinging all devices of type: {device_type}")
         else:
             devices = Device.objects.all()
+            base_filter = {}
             self.logger.info("Pinging all devices.")
 
-        if not devices.exists():
-            self.logger.info("No devices found in Nautobot.")
-            return "No devices found in Nautobot."
-        success_count = 0
-        fail_count = 0
-        for device in devices:
-            domain = device.custom_field_data.get("Domain")
-            if not domain:
-                self.logger.warning(f"Device {device.name} has no Domain custom field; skipping.")
-                continue
-            url = f"https://{domain}:443/cgi-bin/rpc.cgi"
-            payload = {"method": "device_ping"}
-            try:
-                resp = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, verify=False, timeout=10)
-                if resp.status_code == 200:
-                    self.logger.info(f"{device.name} ({domain}): API reachable.")
-                    success_count += 1
-                else:
-                    self.logger.error(f"{device.name} ({domain}): API NOT reachable. Status: {resp.status_code}")
-                    fail_count += 1
-            except Exception as e:
-                self.logger.error(f"{device.name} ({domain}): Exception: {e}")
-                fail_count += 1
-        summary = f"Pinged {success_count + fail_count} devices: {success_count} successful, {fail_count} failed."
+        options = {
+            "max_concurrency": max_concurrency,
+            "ping_timeout": ping_timeout,
+            "job_deadline": job_deadline,
+            "probe_mode": probe_mode,
+            "tcp_timeout": tcp_timeout,
+            "incremental_ttl": incremental_ttl,
+            "log_verbosity": log_verbosity,
+            "report_format": report_format,
+            "timing_file": timing_file,
+        }
+        if shard_count > 1 and not device:
+            counts = self._run_shards(devices, base_filter, shard_count, shard_by, options)
+        else:
+            # A single device is usually someone waiting on the result; let it ahead of fleet sweeps.
+            priority = PRIORITY_INTERACTIVE if device else PRIORITY_BULK
+            counts = self._ping(devices, priority=priority, **options)
+        summary = self._summary(counts, probe_mode, incremental_ttl)
         self.logger.info(summary)
         return summary
 
-jobs.register_jobs(RacomDevicePing)
+    def _run_shards(self, devices, base_filter, shard_count, shard_by, options):
+        """
+        Queue one RacomDevicePingShard per shard, wait for them and add up their counts and reports.
+
+        Shards run in parallel only as far as there are free Celery workers; this job
+        occupies one of them while it waits. ``timing_file`` is forwarded, so each shard
+        attaches the timings of its own calls. If the shard job is not enabled, all devices
+        are pinged by this job instead.
+        """
+        started = time.monotonic()
+        try:
+            shards = [
+                enqueue_job(RacomDevicePingShard, self.user, shard_filter=json.dumps({**base_filter, **shard}), **options)
+                for shard in shard_filters(devices, shard_count, shard_by)
+            ]
+        except JobNotEnabledError as e:
+            # Raised by the first enqueue, so no shard has been queued yet.
+            self.logger.warning(f"{e} Pinging all devices in this job instead.")
+            return self._ping(devices, **options)
+        self.logger.info(f"Queued {len(shards)} shard job(s) split by {shard_by}.")
+        pending = {job_result.pk for job_result in shards}
+        while pending and time.monotonic() - started < options["job_deadline"] + SHARD_WAIT_GRACE:
+            time.sleep(SHARD_POLL_INTERVAL)
+            pending = set(
+                JobResult.objects.filter(pk__in=pending)
+                .exclude(status__in=JobResultStatusChoices.READY_STATES)
+                .values_list("pk", flat=True)
+            )
+
+        counts = dict.fromkeys(COUNT_KEYS, 0)
+        report_format = options["report_format"]
+        report = None if report_format == REPORT_NONE else PingReport(report_format)
+        for index, job_result in enumerate(shards, 1):
+            job_result.refresh_from_db()
+            if job_result.status == JobResultStatusChoices.STATUS_SUCCESS and isinstance(job_result.result, dict):
+                for key in COUNT_KEYS:
+                    counts[key] += job_result.result.get(key, 0)
+                if report is not None:
+                    for shard_file in job_result.files.filter(name__endswith=f"-ping-report.{report_format}.gz"):
+                        with shard_file.file.open("rb") as f, gzip.open(f, "rt", encoding="utf-8", newline="") as rows:
+                            report.extend(rows)
+                self.logger.info(
+                    f"Shard {index}/{len(shards)}: {job_result.result['success']} successful, "
+                    f"{job_result.result['failed']} failed."
+                )
+            else:
+                counts["unfinished_shards"] += 1
+                self.logger.error(f"Shard {index}/{len(shards)} ({job_result.pk}) did not finish: {job_result.status}.")
+        if report is not None:
+            report.attach(self)
+        return counts
+
+
+class RacomDevicePingShard(RacomPingJobBase):
+    """
+    One shard of a sharded RacomDevicePing run; returns its counts for the parent to add up.
+    """
+    class Meta:
+        name = "Racom Device API Ping Shard"
+        description = "Pings the devices of one shard queued by Racom Device API Ping."
+        commit_default = False
+        hidden = True
+
+    shard_filter = StringVar(
+        description="JSON Device filter kwargs selecting this shard's devices."
+    )
+
+    def run(self, *, shard_filter, max_concurrency=DEFAULT_MAX_CONCURRENCY, ping_timeout=DEFAULT_TIMEOUT,
+            job_deadline=DEFAULT_DEADLINE, probe_mode=PROBE_RPC, tcp_timeout=DEFAULT_TCP_TIMEOUT,
+            incremental_ttl=0, log_verbosity=VERBOSITY_FAILURES, report_format=REPORT_CSV, timing_file=False,
+            commit=None):
+        counts = self._ping(
+            Device.objects.filter(**json.loads(shard_filter)),
+            max_concurrency=max_concurrency,
+            ping_timeout=ping_timeout,
+            job_deadline=job_deadline,
+            probe_mode=probe_mode,
+            tcp_timeout=tcp_timeout,
+            incremental_ttl=incremental_ttl,
+            log_verbosity=log_verbosity,
+            report_format=report_format,
+            timing_file=timing_file,
+        )
+        self.logger.info(self._summary(counts, probe_mode, incremental_ttl))
+        return counts
 
+jobs.register_jobs(RacomDevicePing, RacomDevicePingShard)
@@ -1,8 +1,16 @@
-import requests
+from django.conf import settings
 from nautobot.apps.jobs import JobButtonReceiver
 from nautobot.apps import jobs
 from nautobot.dcim.models import Device, DeviceType
 
+from .job_logging import VERBOSITY_FAILURES, BufferedJobLog
+from .racom_devices import iter_targets
+from .racom_reachability import ReachabilityStore
+from .racom_report import REPORT_CSV, REPORT_NONE, PingReport
+from .racom_scheduling import INTERACTIVE_QUEUE, PRIORITY_BULK, PRIORITY_INTERACTIVE
+from .timing import job_timing
+from .racom_engine import ERROR_CIRCUIT_OPEN, ping_devices
+
 class RacomDeviceContextualPing(JobButtonReceiver):
     class Meta:
         name = "Racom Device Contextual Ping"
@@ -10,46 +18,53 @@ class RacomDeviceContextualPing(JobButtonReceiver):
         commit_default = False
         # model attribute tells JobButtonReceiver which object types this button should appear on
         model = ["dcim.device", "dcim.devicetype"]
+        # Someone is waiting on every button press; deployments that run a worker for the
+        # interactive queue can route button jobs there, away from the bulk sweeps.
+        task_queues = [settings.CELERY_TASK_DEFAULT_QUEUE, INTERACTIVE_QUEUE]
 
+    # Job buttons take no inputs. Every device is listed in the attached report, so by default
+    # only failures and the summary are logged; set to VERBOSITY_ALL to log every device.
+    log_verbosity = VERBOSITY_FAILURES
+    # Format of the attached per-device report; REPORT_NONE attaches none.
+    report_format = REPORT_CSV
 
-    def _perform_ping(self, devices_to_ping):
+    def _perform_ping(self, devices_to_ping, priority=PRIORITY_BULK):
         """
         Helper method containing the core pinging logic.
         """
-        if not devices_to_ping.exists():
-            self.logger.warning("No devices selected or found to ping.")
-            return "No devices selected or found to ping."
-
         success_count = 0
         fail_count = 0
+        circuit_open_count = 0
+        report = None if self.report_format == REPORT_NONE else PingReport(self.report_format)
 
-        for dev_instance in devices_to_ping:
-            domain = dev_instance.custom_field_data.get("Domain")
-            if not domain:
-                self.logger.warning(f"Device {dev_instance.name} has no Domain custom field; skipping.")
-                continue
-            
-            url = f"https://{domain}:443/cgi-bin/rpc.cgi"
-            payload = {"method": "device_ping"}
-            
-            try:
-                # Disable SSL verification for self-signed certs
-                resp = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, verify=False, timeout=10)
-                
-                if resp.status_code == 200:
-                    self.logger.info(f"{dev_instance.name} ({domain}): API reachable (HTTP 200).")
+        with job_timing(self), BufferedJobLog(self, verbosity=self.log_verbosity) as log, ReachabilityStore() as store:
+            for result in ping_devices(iter_targets(devices_to_ping), priority=priority):
+                store.record(result)
+                if report is not None:
+                    report.record(result)
+                if result.ok:
+                    log.info(f"{result.name} ({result.domain}): API reachable (HTTP 200).")
                     success_count += 1
+                elif result.error_class == ERROR_CIRCUIT_OPEN:
+                    log.warning(f"{result.name} ({result.domain}): {result.error}")
+                    circuit_open_count += 1
+                    fail_count += 1
+                elif result.error:
+                    log.error(f"{result.name} ({result.domain}): {result.error}")
+                    fail_count += 1
                 else:
-                    self.logger.error(f"{dev_instance.name} ({domain}): API NOT reachable. Status: {resp.status_code}. Response: {resp.text[:200]}...")
+                    log.error(f"{result.name} ({result.domain}): API NOT reachable. Status: {result.status_code}. Response: {result.detail}...")
                     fail_count += 1
-            except requests.exceptions.RequestException as e:
-                self.logger.error(f"{dev_instance.name} ({domain}): Request Exception: {e}")
-                fail_count += 1
-            except Exception as e: # Generic exception
-                self.logger.error(f"{dev_instance.name} ({domain}): Generic Exception during ping: {e}")
-                fail_count += 1
+        if report is not None:
+            report.attach(self)
+
+        if not success_count + fail_count:
+            self.logger.warning("No devices with a Domain selected or found to ping.")
+            return "No devices with a Domain selected or found to ping."
 
-        summary = f"Ping Results: Processed {devices_to_ping.count()} device(s). Successful: {success_count}, Failed: {fail_count}."
+        summary = f"Ping Results: Processed {success_count + fail_count} device(s). Successful: {success_count}, Failed: {fail_count}."
+        if circuit_open_count:
+            summary += f" {circuit_open_count} failed fast on an open circuit."
         self.logger.info(summary)
         return summary
 
@@ -57,11 +72,12 @@ class RacomDeviceContextualPing(JobButtonReceiver):
         if isinstance(obj, Device):
             self.logger.info(f"Context: Device - {obj.name}")
             devices_to_ping = Device.objects.filter(pk=obj.pk)
-            return self._perform_ping(devices_to_ping)
+            # Someone is waiting on this button; go ahead of bulk sweeps.
+            return self._perform_ping(devices_to_ping, priority=PRIORITY_INTERACTIVE)
         elif isinstance(obj, DeviceType):
             self.logger.info(f"Context: DeviceType - {obj.model}")
             devices_to_ping = Device.objects.filter(device_type=obj)
-            return self._perform_ping(devices_to_ping)
+            return self._perform_ping(devices_to_ping, priority=PRIORITY_BULK)
         else:
             self.logger.error(f"Unsupported object type for button trigger: {type(obj).__name__}")
             return f"Error: Job button called on unsupported object type {type(obj).__name__}."
@@ -0,0 +1,109 @@
+"""
+Per-device cache of the latest RACOM ping result, used by incremental ping runs.
+
+Results are kept in the Django cache under ``racom:reachability:<device pk>``
+as small dictionaries (ok, status, latency_ms, checked_at, error_class, probe).
+The cache is not durable and cannot be queried, so it is only a hint for which
+devices are due for a ping; the ping report attached to each run is the record.
+Writes are buffered and sent with ``set_many``; reads use ``get_many``.
+"""
+import time
+
+from django.core.cache import cache
+
+from .racom_engine import PROBE_RPC, PROBE_TCP
+
+DEFAULT_FLUSH_SIZE = 500
+RETENTION = 7 * 24 * 60 * 60
+
+
+def _key(device_pk):
+    return f"racom:reachability:{device_pk}"
+
+
+class ReachabilityStore:
+    """
+    Buffered writer and batched reader for per-device ping results.
+    """
+
+    def __init__(self, flush_size=DEFAULT_FLUSH_SIZE):
+        self.flush_size = flush_size
+        self._pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def record(self, result, probe=PROBE_RPC):
+        """
+        Queue a racom_engine.PingResult for writing; ``probe`` says whether it came from a TCP-only sweep.
+        """
+        self._pending[_key(result.pk)] = {
+            "ok": result.ok,
+            "status": result.status_code,
+            "latency_ms": None if result.latency is None else round(result.latency * 1000),
+            "checked_at": time.time(),
+            "error_class": result.error_class,
+            "probe": probe,
+        }
+        if len(self._pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            cache.set_many(self._pending, timeout=RETENTION)
+            self._pending = {}
+
+    @staticmethod
+    def get_many(device_pks):
+        """
+        Return ``{device_pk: result}`` for the devices that have a stored result.
+        """
+        keys = {_key(pk): pk for pk in device_pks}
+        return {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+
+class StaleTargetFilter:
+    """
+    Drop targets whose last stored result is a success younger than ``ttl`` seconds.
+
+    For ``probe=PROBE_TCP`` any recent success counts; otherwise only a successful RPC
+    ping does. ``skipped`` counts the targets left out.
+    """
+
+    def __init__(self, ttl, probe=PROBE_RPC, batch_size=DEFAULT_FLUSH_SIZE):
+        self.ttl = ttl
+        self.probe = probe
+        self.batch_size = batch_size
+        self.skipped = 0
+
+    def filter(self, targets):
+        """
+        Yield the ``(pk, name, domain)`` targets that are due for a ping.
+        """
+        batch = []
+        for target in targets:
+            batch.append(target)
+            if len(batch) >= self.batch_size:
+                yield from self._filter_batch(batch)
+                batch = []
+        yield from self._filter_batch(batch)
+
+    def _filter_batch(self, batch):
+        if not batch:
+            return
+        known = ReachabilityStore.get_many(target[0] for target in batch)
+        cutoff = time.time() - self.ttl
+        for target in batch:
+            last = known.get(target[0])
+            if (
+                last
+                and last["ok"]
+                and last["checked_at"] >= cutoff
+                and (self.probe == PROBE_TCP or last.get("probe") == PROBE_RPC)
+            ):
+                self.skipped += 1
+                continue
+            yield target
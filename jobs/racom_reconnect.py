@@ -0,0 +1,113 @@
+"""
+Deferred settings_save_reconnect verification after RACOM config deploys.
+
+Instead of holding a worker while the radios restart, the deploying job queues
+one RacomReconnectCheck for all the sessions it started. Each run makes one short
+reconnect call per pending session and, if some devices are not back yet,
+re-queues itself for just those with exponential backoff.
+"""
+import json
+
+from nautobot.apps.jobs import Job, IntegerVar, StringVar
+from nautobot.apps import jobs
+
+from .job_logging import BufferedJobLog
+from .racom_client import get_client
+from .racom_engine import run_concurrently
+from .racom_enqueue import JobNotEnabledError, enqueue_job
+from .timing import job_timing
+
+DEFAULT_INTERVAL = 2
+MAX_DELAY = 60
+MAX_ATTEMPTS = 8
+CHECK_TIMEOUT = 5
+CHECK_CONCURRENCY = 32
+# Time budget for one round of checks; sessions not checked by then wait for the next round.
+CHECK_DEADLINE = 120
+
+
+class RacomReconnectCheck(Job):
+    """
+    Verify that RACOM devices came back after settings_save_init.
+    """
+    class Meta:
+        name = "Racom Reconnect Check"
+        description = "Deferred settings_save_reconnect checks queued after config deploys."
+        commit_default = False
+        hidden = True
+
+    sessions = StringVar(description="JSON list of [domain, session_id] pairs returned by settings_save_init.")
+    attempt = IntegerVar(default=1, min_value=1, description="Attempt number.")
+    delay = IntegerVar(default=DEFAULT_INTERVAL, min_value=1, description="Seconds waited before this attempt.")
+
+    def run(self, *, sessions, attempt=1, delay=DEFAULT_INTERVAL):
+        sessions = json.loads(sessions)
+        client = get_client()
+
+        def check(session):
+            return client.settings_save_reconnect(session[0], session[1], timeout=CHECK_TIMEOUT)
+
+        reconnected_count = 0
+        pending = []
+        with job_timing(self), BufferedJobLog(self) as log:
+            for (domain, session_id), reconnected, error in run_concurrently(
+                check, sessions, CHECK_CONCURRENCY, CHECK_DEADLINE
+            ):
+                if error is not None:
+                    log.warning(f"[RECONNECT] {domain}: Exception during reconnect: {error}")
+                if reconnected:
+                    log.info(f"[RECONNECT] {domain}: Success")
+                    reconnected_count += 1
+                elif attempt >= MAX_ATTEMPTS:
+                    log.error(f"[RECONNECT] {domain}: Failed after retries")
+                else:
+                    pending.append([domain, session_id])
+
+        summary = f"{reconnected_count} of {len(sessions)} device(s) reconnected on attempt {attempt}."
+        if not pending:
+            failed_count = len(sessions) - reconnected_count
+            if failed_count:
+                summary += f" {failed_count} did not reconnect after {attempt} attempt(s)."
+            self.logger.info(summary)
+            return summary
+        next_delay = min(delay * 2, MAX_DELAY)
+        enqueue_job(
+            RacomReconnectCheck, self.user, countdown=next_delay,
+            sessions=json.dumps(pending), attempt=attempt + 1, delay=next_delay,
+        )
+        summary += f" Waiting for {len(pending)} ({attempt}/{MAX_ATTEMPTS}), next check in {next_delay}s..."
+        self.logger.info(summary)
+        return summary
+
+
+def schedule_reconnect_checks(user, deploy_results, logger):
+    """
+    Queue one RacomReconnectCheck for the ``(domain, settings_save_init result)`` pairs in ``deploy_results``.
+    """
+    sessions = []
+    delays = []
+    for domain, deploy_result in deploy_results:
+        session_id = (deploy_result or {}).get("session_id")
+        if session_id:
+            sessions.append([domain, str(session_id)])
+            delays.append(max(1, int(deploy_result.get("interval", DEFAULT_INTERVAL))))
+    if not sessions:
+        return
+    # The first check waits for the slowest device's polling interval.
+    delay = max(delays)
+    try:
+        enqueue_job(RacomReconnectCheck, user, countdown=delay, sessions=json.dumps(sessions), delay=delay)
+        logger.info(f"[RECONNECT] Verification queued for {len(sessions)} session(s).")
+    except JobNotEnabledError as e:
+        logger.warning(f"[RECONNECT] Reconnect after {len(sessions)} session(s) will not be verified. {e}")
+    except Exception as e:
+        logger.error(f"[RECONNECT] Could not queue reconnect check: {e}")
+
+
+def schedule_reconnect_check(user, domain, deploy_result, logger):
+    """
+    Queue a RacomReconnectCheck for a single settings_save_init result.
+    """
+    schedule_reconnect_checks(user, [(domain, deploy_result)], logger)
+
+jobs.register_jobs(RacomReconnectCheck)
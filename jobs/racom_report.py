@@ -0,0 +1,100 @@
+"""
+Downloadable per-device ping report for the RACOM ping jobs.
+
+Rows are gzip-compressed into a temporary file as results come in, so memory
+stays flat, and the finished file is attached to the JobResult with
+``create_file``.
+"""
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import datetime, timezone
+
+REPORT_NONE = "none"
+REPORT_CSV = "csv"
+REPORT_JSONL = "jsonl"
+REPORT_CHOICES = (
+    (REPORT_CSV, "CSV"),
+    (REPORT_JSONL, "JSON Lines"),
+    (REPORT_NONE, "No report"),
+)
+REPORT_FIELDS = ("device", "device_pk", "domain", "status", "http_code", "latency_ms", "error_class", "error", "checked_at")
+
+
+def _status(result):
+    if result.ok:
+        return "ok"
+    return result.error_class or "failed"
+
+
+class PingReport:
+    """
+    Spool of one report row per racom_engine.PingResult, in CSV or JSON Lines format.
+    """
+
+    def __init__(self, report_format=REPORT_CSV):
+        self.report_format = report_format
+        self.row_count = 0
+        self._file = tempfile.TemporaryFile()
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode="wb")
+        self._text = io.TextIOWrapper(self._gzip, encoding="utf-8", newline="")
+        self._csv = None
+        if report_format == REPORT_CSV:
+            self._csv = csv.writer(self._text)
+            self._csv.writerow(REPORT_FIELDS)
+
+    def record(self, result):
+        row = (
+            result.name,
+            str(result.pk),
+            result.domain,
+            _status(result),
+            result.status_code,
+            None if result.latency is None else round(result.latency * 1000),
+            result.error_class,
+            result.error or result.detail or None,
+            datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self._text.write(json.dumps(dict(zip(REPORT_FIELDS, row))) + "\n")
+        self.row_count += 1
+
+    def extend(self, lines):
+        """
+        Append the rows of another report of the same format, given as a text file opened with ``newline=""``.
+        """
+        if self._csv:
+            rows = csv.reader(lines)
+            next(rows, None)
+            for row in rows:
+                self._csv.writerow(row)
+                self.row_count += 1
+        else:
+            for line in lines:
+                self._text.write(line)
+                self.row_count += 1
+
+    def attach(self, job):
+        """
+        Attach the gzipped report to ``job``'s JobResult and close it; returns the FileProxy, or None if none was attached.
+
+        A report over Nautobot's JOB_CREATE_FILE_MAX_SIZE is logged as an error rather
+        than failing the job.
+        """
+        # Closing the text and gzip layers finishes compression but leaves the temporary file open.
+        self._text.close()
+        with self._file:
+            if not self.row_count:
+                return None
+            self._file.seek(0)
+            content = self._file.read()
+        name = f"{job.__class__.__name__}-ping-report.{self.report_format}.gz"
+        try:
+            return job.create_file(name, content)
+        except ValueError as e:
+            job.logger.error(f"Could not attach {name} ({self.row_count} rows): {e}")
+            return None
@@ -0,0 +1,39 @@
+"""
+Priority lanes for calls to RACOM devices.
+
+The ping jobs list INTERACTIVE_QUEUE after Nautobot's default queue, so they run
+on the default queue unless that one is chosen. A deployment that starts a worker
+for it (``nautobot-server celery worker --queues racom-interactive``) can send
+interactive work - a user waiting on a single-device button or ping - there, where
+it never waits behind fleet sweeps for a worker. While an interactive
+call is in progress anywhere it also raises a flag in the Django cache, and bulk
+calls in every worker see the flag and pause before each call until it expires,
+leaving device links and resolvers to the interactive call.
+"""
+import os
+import time
+
+from django.core.cache import cache
+
+from .timing import record
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+INTERACTIVE_QUEUE = os.environ.get("RACOM_INTERACTIVE_QUEUE", "racom-interactive")
+INTERACTIVE_KEY = "racom:interactive-active"
+# How long an interactive call keeps bulk callers slowed down after it was made.
+INTERACTIVE_HOLD = 5
+# Seconds a bulk call waits while an interactive call is active.
+CONTENDED_BULK_DELAY = 0.25
+
+
+def acquire(priority=PRIORITY_BULK):
+    """
+    Wait until a call in lane ``priority`` may go ahead, recording any wait as a "priority_wait" timing.
+    """
+    if priority == PRIORITY_INTERACTIVE:
+        cache.set(INTERACTIVE_KEY, True, timeout=INTERACTIVE_HOLD)
+    elif cache.get(INTERACTIVE_KEY):
+        time.sleep(CONTENDED_BULK_DELAY)
+        record("priority_wait", CONTENDED_BULK_DELAY)
@@ -0,0 +1,163 @@
+"""
+Per-device cache of the last known RACOM device config.
+
+Snapshots live in the Django cache keyed by device pk and carry a content hash
+and fetch timestamp, so repeat read-only checks within a TTL skip settings_get.
+Deploys start from a config read from the device - the caller's own read, or a
+new settings_get when the caller compared against a cached snapshot - are
+skipped when the target hashes the same as that config, and send only the
+changed part of the config to devices whose firmware is known to accept
+partial saves.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+
+from django.core.cache import cache
+
+from .racom_client import RacomError
+
+DEFAULT_MAX_AGE = 300
+# Upper bound on how long a snapshot is kept; each store's max_age decides how old a snapshot it trusts.
+RETENTION = 24 * 60 * 60
+# How long a domain whose firmware rejected a partial save is sent full configs; upgrades are picked up after this.
+CAPABILITY_TTL = 24 * 60 * 60
+# Oldest firmware version, as recorded on the Device in Nautobot, that accepts partial saves.
+# Empty disables partial saves: firmware that ignores the partial flag would replace
+# the whole config with the changed subtree.
+PARTIAL_SAVE_MIN_FIRMWARE = os.environ.get("RACOM_PARTIAL_SAVE_MIN_FIRMWARE", "")
+
+
+def config_hash(config_data):
+    return hashlib.sha256(json.dumps(config_data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def config_diff(current, target):
+    """
+    Return the smallest subtree of ``target`` that turns ``current`` into ``target`` when merged into it.
+
+    Nested dictionaries are compared key by key and any other changed value is taken
+    whole. Returns {} if nothing changed, or None if ``target`` drops a key ``current``
+    has, which a merge cannot express.
+    """
+    changes = {}
+    for key, value in target.items():
+        old = current.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = config_diff(old, value)
+            if nested is None:
+                return None
+            if nested:
+                changes[key] = nested
+        elif key not in current or old != value:
+            changes[key] = value
+    if any(key not in target for key in current):
+        return None
+    return changes
+
+
+def _version_tuple(version):
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
+def supports_partial_save(device, min_firmware=None):
+    """
+    Return True only if ``device``'s firmware version in Nautobot is at least ``min_firmware``.
+
+    ``min_firmware`` defaults to PARTIAL_SAVE_MIN_FIRMWARE. Devices without a recorded
+    software version, or with no minimum configured, get full saves.
+    """
+    min_firmware = PARTIAL_SAVE_MIN_FIRMWARE if min_firmware is None else min_firmware
+    software_version = getattr(device, "software_version", None)
+    if not min_firmware or software_version is None:
+        return False
+    return _version_tuple(software_version.version) >= _version_tuple(min_firmware)
+
+
+def _key(device_pk):
+    return f"racom:config-snapshot:{device_pk}"
+
+
+def _partial_key(domain):
+    return f"racom:partial-save-rejected:{domain}"
+
+
+class ConfigSnapshotStore:
+    """
+    Read-through settings_get cache in front of a RacomClient.
+    """
+
+    def __init__(self, client, max_age=DEFAULT_MAX_AGE):
+        self.client = client
+        self.max_age = max_age
+
+    def get(self, device_pk):
+        """
+        Return the stored ``{"hash", "fetched_at", "config"}`` snapshot, or None.
+        """
+        return cache.get(_key(device_pk))
+
+    def put(self, device_pk, config_data):
+        """
+        Store ``config_data`` as the device's snapshot and return the snapshot.
+        """
+        snapshot = {"hash": config_hash(config_data), "fetched_at": time.time(), "config": config_data}
+        cache.set(_key(device_pk), snapshot, timeout=RETENTION)
+        return snapshot
+
+    def fetch_snapshot(self, device_pk, domain, timeout=None):
+        """
+        Return the device's snapshot, from the cache if it is younger than ``max_age`` seconds.
+
+        The returned snapshot also carries ``cached``, True when no settings_get was made.
+        """
+        if self.max_age > 0:
+            snapshot = self.get(device_pk)
+            if snapshot and time.time() - snapshot["fetched_at"] < self.max_age:
+                return {**snapshot, "cached": True}
+        config_data = self.client.settings_get(domain, timeout=timeout)
+        return {**self.put(device_pk, config_data), "cached": False}
+
+    def fetch(self, device_pk, domain, timeout=None):
+        """
+        Return the device config, from the cache if the snapshot is younger than ``max_age`` seconds.
+        """
+        return self.fetch_snapshot(device_pk, domain, timeout=timeout)["config"]
+
+    def deploy(self, device_pk, domain, update, snapshot=None, partial=False, timeout=None):
+        """
+        Apply ``update`` to the device's current config and deploy the result if it changed anything.
+
+        ``update`` takes the config dictionary and returns the target config. ``snapshot``
+        is what fetch_snapshot returned for the comparison that led to this deploy; its
+        config is used as is when it was just read from the device, and re-read with
+        settings_get when it came from the cache or is not given, so changes made on the
+        device since a cached snapshot are not overwritten. The full config is sent unless
+        ``partial`` says the firmware supports partial saves (see supports_partial_save), in
+        which case only the changed subtree is; a domain that still rejects it is remembered
+        for CAPABILITY_TTL and gets the full config instead. The snapshot is dropped after a
+        deploy because the device has not applied the new config yet.
+
+        Returns the settings_save_init result, or None when the target config hashes the
+        same as the device's current one.
+        """
+        if snapshot is None or snapshot["cached"]:
+            snapshot = self.put(device_pk, self.client.settings_get(domain, timeout=timeout))
+        current = snapshot["config"]
+        target = update(copy.deepcopy(current))
+        if config_hash(target) == snapshot["hash"]:
+            return None
+        changes = config_diff(current, target) if partial and not cache.get(_partial_key(domain)) else None
+        result = None
+        if changes:
+            try:
+                result = self.client.settings_save_init(domain, changes, partial=True, timeout=timeout)
+            except RacomError:
+                cache.set(_partial_key(domain), True, timeout=CAPABILITY_TTL)
+        if result is None:
+            result = self.client.settings_save_init(domain, target, timeout=timeout)
+        cache.delete(_key(device_pk))
+        return result
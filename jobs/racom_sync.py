@@ -0,0 +1,98 @@
+"""
+Reconciliation between Nautobot devices and RACOM device configs.
+"""
+
+# Device config fields kept in line with Nautobot: (config section, config key, Device field lookup with the value).
+DRIFT_FIELDS = (
+    ("main", "RR_StationName", "name"),
+)
+# Device field lookups to select for expected_config.
+DRIFT_LOOKUPS = tuple(dict.fromkeys(lookup for _, _, lookup in DRIFT_FIELDS))
+
+
+def expected_config(values):
+    """
+    Return ``{(section, key): value}`` with the config values Nautobot expects, given a device's ``{lookup: value}``.
+    """
+    return {(section, key): values[lookup] for section, key, lookup in DRIFT_FIELDS}
+
+
+def find_drift(config_data, expected):
+    """
+    Return ``[(section, key, device_value, nautobot_value)]`` for every expected value the config does not match.
+    """
+    drift = []
+    for (section, key), value in expected.items():
+        current = config_data.get(section, {}).get(key)
+        if current != value:
+            drift.append((section, key, current, value))
+    return drift
+
+
+def apply_drift(config_data, drift):
+    """
+    Overwrite the drifted fields in ``config_data`` with their Nautobot values.
+    """
+    for section, key, _, value in drift:
+        config_data.setdefault(section, {})[key] = value
+    return config_data
+
+
+def sync_station_name(snapshots, device_pk, nautobot_name, domain, logger, partial=False):
+    """
+    Make the device's RR_StationName match ``nautobot_name``, deploying the config if it differs.
+
+    ``snapshots`` is a racom_snapshots.ConfigSnapshotStore; the name is compared against
+    its snapshot, so a recent one saves the settings_get round-trip, and deploys go
+    through it, which re-reads the config only if that snapshot came from the cache.
+    ``partial`` is passed on to ConfigSnapshotStore.deploy.
+
+    Returns the settings_save_init result when a config was deployed, else None; pass it
+    to racom_reconnect.schedule_reconnect_check instead of waiting for the device here.
+    Raises if the config cannot be read or deployed.
+    """
+    # --- Get config (logs in on demand) ---
+    try:
+        snapshot = snapshots.fetch_snapshot(device_pk, domain)
+        config_name = snapshot["config"]["main"]["RR_StationName"]
+    except Exception as e:
+        logger.error(f"Could not extract station name from config: {e}")
+        raise Exception(f"Could not extract station name from config: {e}")
+    # --- Compare names and update if needed ---
+    if nautobot_name != config_name:
+        msg = f"Device name mismatch: Nautobot='{nautobot_name}' vs DeviceConfig='{config_name}'. Updating device config..."
+        logger.warning(msg)
+
+        def set_station_name(config):
+            config["main"]["RR_StationName"] = nautobot_name
+            return config
+
+        # Deploy updated config
+        try:
+            deploy_result = snapshots.deploy(device_pk, domain, set_station_name, snapshot=snapshot, partial=partial)
+            if deploy_result is None:
+                logger.info(f"Device at {domain} already has the target config; deploy skipped.")
+            else:
+                logger.info(f"Successfully updated device config name to '{nautobot_name}' on device at {domain}")
+        except Exception as e:
+            logger.error(f"Exception during config deployment: {e}")
+            raise Exception(f"Exception during config deployment: {e}")
+        return deploy_result
+    logger.info(f"Device name matches: '{nautobot_name}'")
+    return None
+
+
+class LogRecorder:
+    """
+    Stand-in logger that records calls made in worker threads so they can be replayed into the job log.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def __getattr__(self, level):
+        return lambda message: self.records.append((level, message))
+
+    def replay(self, logger):
+        for level, message in self.records:
+            getattr(logger, level)(message)
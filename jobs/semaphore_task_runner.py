@@ -0,0 +1,438 @@
+from nautobot.apps.jobs import Job, StringVar, BooleanVar, ChoiceVar, IntegerVar
+import requests
+import json
+import gzip
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .job_logging import VERBOSITY_ALL, VERBOSITY_CHOICES, BufferedJobLog
+from .timed_http import TimedHTTPAdapter
+from .timing import job_timing, measure
+
+OUTPUT_CHUNK_SIZE = 64 * 1024
+COMPLETED_STATUSES = ("success", "error", "failed")
+DEFAULT_MONITOR_TIMEOUT = 600
+POLL_INITIAL_INTERVAL = 1
+POLL_MAX_INTERVAL = 15
+POLL_BACKOFF_FACTOR = 1.5
+# Semaphore returns the whole output on every request, so it is fetched less often than the status.
+OUTPUT_POLL_INTERVAL = 30
+_JSON_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a JSON array arriving as text ``chunks`` without holding the whole array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    opened = False
+    for chunk in chunks:
+        buffer += chunk
+        pos = _JSON_SEPARATORS.match(buffer).end()
+        if not opened:
+            if pos == len(buffer):
+                continue
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            opened = True
+            pos += 1
+        while True:
+            pos = _JSON_SEPARATORS.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # Incomplete element; wait for the next chunk
+                break
+            if end == len(buffer):
+                # A number may continue in the next chunk; a complete array always has "]" after it.
+                break
+            pos = end
+            yield item
+        buffer = buffer[pos:]
+
+
+def parse_templates(spec, default_project_id):
+    """
+    Parse ``"1,2,5:7"`` into ``[(project_id, template_id), ...]``; bare IDs use ``default_project_id``.
+    """
+    templates = []
+    for item in str(spec).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        project_id, _, template_id = item.rpartition(":")
+        project_id = project_id.strip() or str(default_project_id)
+        template_id = template_id.strip()
+        if not project_id.isdigit() or not template_id.isdigit():
+            raise ValueError(f"'{item}' is not a template ID or project:template pair")
+        templates.append((project_id, template_id))
+    if not templates:
+        raise ValueError("no template IDs given")
+    return templates
+
+
+class SemaphoreTask:
+    """
+    A launched Semaphore task and the state of its output stream.
+    """
+
+    def __init__(self, project_id, template_id, task_id, status):
+        self.project_id = project_id
+        self.template_id = template_id
+        self.task_id = task_id
+        self.status = status
+        self.output_offset = 0
+        self.output_fetched_at = None
+        self.archive = OutputArchive()
+        self.log = None
+
+
+class OutputArchive:
+    """
+    Gzip-compressed spool of task output lines kept in a temporary file.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode="wb")
+        self.line_count = 0
+
+    def write(self, line):
+        self._gzip.write(f"{line}\n".encode("utf-8"))
+        self.line_count += 1
+
+    def close(self):
+        """
+        Finish compression and return the compressed bytes.
+        """
+        self._gzip.close()
+        self._file.seek(0)
+        data = self._file.read()
+        self._file.close()
+        return data
+
+
+
+class SemaphoreTaskRunner(Job):
+    """
+    A job that logs into Semaphore and runs a specified task template.
+    """
+    class Meta:
+        name = "Semaphore Task Runner"
+        description = "Logs into Semaphore and runs a specified task template"
+        commit_default = False
+
+    # Define class variables for job inputs
+    class InputVariables:
+        semaphore_url = StringVar(
+            description="Semaphore URL",
+            default="http://semaphore:3000",
+            required=True
+        )
+        username = StringVar(
+            description="Semaphore username",
+            default="admin",
+            required=True
+        )
+        password = StringVar(
+            description="Semaphore password",
+            default="admin",
+            required=True
+        )
+        project_id = StringVar(
+            description="Semaphore project ID",
+            default="1",
+            required=True
+        )
+        template_id = StringVar(
+            description="Semaphore task template ID, or a comma-separated list run together; "
+                        "use project:template to override the project per template",
+            default="1",
+            required=True
+        )
+        debug_mode = BooleanVar(
+            description="Enable debug mode for the task",
+            default=False,
+            required=False
+        )
+        log_verbosity = ChoiceVar(
+            choices=VERBOSITY_CHOICES,
+            description="Log every task output line, or only the summary",
+            default=VERBOSITY_ALL,
+            required=False
+        )
+        monitor_timeout = IntegerVar(
+            description="Seconds to wait for all tasks to finish",
+            default=DEFAULT_MONITOR_TIMEOUT,
+            required=False
+        )
+        timing_file = BooleanVar(
+            description="Attach per-phase call timings as a Prometheus text file",
+            default=False,
+            required=False
+        )
+
+    def run(self, data=None, commit=None):
+        """
+        The main execution method of the job.
+        """
+        # Initialize default values
+        semaphore_url = "http://semaphore:3000"
+        username = "admin"
+        password = "admin"
+        project_id = "1"
+        template_id = "1"
+        debug_mode = False
+        log_verbosity = VERBOSITY_ALL
+        monitor_timeout = DEFAULT_MONITOR_TIMEOUT
+        timing_file = False
+        
+        # Extract parameters from input data if provided
+        if data is not None:
+            semaphore_url = data.get("semaphore_url", semaphore_url)
+            username = data.get("username", username)
+            password = data.get("password", password)
+            project_id = data.get("project_id", project_id)
+            template_id = data.get("template_id", template_id)
+            debug_mode = data.get("debug_mode", debug_mode)
+            log_verbosity = data.get("log_verbosity", log_verbosity)
+            monitor_timeout = data.get("monitor_timeout", monitor_timeout)
+            timing_file = data.get("timing_file", timing_file)
+        
+        try:
+            templates = parse_templates(template_id, project_id)
+        except ValueError as e:
+            self.logger.error(f"Invalid template list '{template_id}': {e}")
+            return f"Invalid template list '{template_id}': {e}"
+        
+        # Log the start of the job
+        self.logger.info(
+            "Starting Semaphore task runner for "
+            + ", ".join(f"template {tpl} in project {proj}" for proj, tpl in templates)
+        )
+        
+        with job_timing(self, prometheus_file=timing_file):
+            try:
+                # Step 1: Login to Semaphore; the session keeps the cookie and connection for every later call.
+                # verify=False is passed per request since REQUESTS_CA_BUNDLE would override a session setting.
+                self.logger.info("Logging into Semaphore...")
+                session = requests.Session()
+                session.mount("http://", TimedHTTPAdapter())
+                session.mount("https://", TimedHTTPAdapter())
+                session.headers["accept"] = "application/json"
+                login_url = f"{semaphore_url}/api/auth/login"
+                login_payload = {
+                    "auth": username,
+                    "password": password
+                }
+            
+                with measure("semaphore:login"):
+                    login_response = session.post(
+                        login_url,
+                        json=login_payload,
+                        verify=False  # Note: In production, you should verify SSL certificates
+                    )
+            
+                if login_response.status_code != 204:
+                    self.logger.error(f"Failed to login to Semaphore: {login_response.status_code} {login_response.text}")
+                    return f"Failed to login to Semaphore: {login_response.status_code}"
+            
+                # Check the session cookie
+                if not session.cookies.get("semaphore"):
+                    self.logger.error("No session cookie received from Semaphore")
+                    return "Failed: No session cookie received from Semaphore"
+            
+                self.logger.info("Successfully logged into Semaphore")
+            
+                # Step 2: Run all task templates at once
+                with ThreadPoolExecutor(max_workers=len(templates)) as executor:
+                    launches = [
+                        executor.submit(self._launch_task, session, semaphore_url, proj, tpl, debug_mode)
+                        for proj, tpl in templates
+                    ]
+                tasks = []
+                for launch in launches:
+                    try:
+                        task = launch.result()
+                    except Exception as e:
+                        self.logger.error(str(e))
+                        continue
+                    self.logger.success(
+                        f"Successfully started task with ID {task.task_id} for template {task.template_id}, status: {task.status}"
+                    )
+                    tasks.append(task)
+                if not tasks:
+                    return "Failed to run task template" + ("s" if len(templates) > 1 else "")
+            
+                # Step 3: Monitor every task in one poll loop
+                self._monitor_tasks(session, semaphore_url, tasks, log_verbosity, monitor_timeout)
+            
+            except Exception as e:
+                self.logger.error(f"Error running Semaphore task: {str(e)}")
+                return f"Error running Semaphore task: {str(e)}"
+        
+        failed_launches = len(templates) - len(tasks)
+        # Keep the single-template messages of earlier versions
+        if len(templates) == 1:
+            task = tasks[0]
+            if task.status == "success":
+                return f"Task {task.task_id} completed successfully"
+            elif task.status in COMPLETED_STATUSES:
+                return f"Task {task.task_id} failed with status: {task.status}"
+            return f"Task monitoring timed out after {monitor_timeout} seconds. Last status: {task.status}"
+        succeeded = sum(1 for task in tasks if task.status == "success")
+        timed_out = sum(1 for task in tasks if task.status not in COMPLETED_STATUSES)
+        return (
+            f"Ran {len(templates)} templates: {succeeded} succeeded, {len(tasks) - succeeded - timed_out} failed, "
+            f"{timed_out} timed out, {failed_launches} could not be started"
+        )
+
+    def _launch_task(self, session, semaphore_url, project_id, template_id, debug_mode):
+        """
+        Start one task template and return a SemaphoreTask.
+
+        Runs in a worker thread, so failures are raised for the caller to log.
+        """
+        run_task_url = f"{semaphore_url}/api/project/{project_id}/tasks"
+        run_task_payload = {
+            "template_id": int(template_id)
+        }
+        
+        # Add debug mode if requested
+        if debug_mode:
+            run_task_payload["debug"] = True
+        
+        with measure("semaphore:launch"):
+            run_task_response = session.post(run_task_url, json=run_task_payload, verify=False)
+        
+        if run_task_response.status_code != 201:
+            raise RuntimeError(
+                f"Failed to run task template {template_id}: {run_task_response.status_code} {run_task_response.text}"
+            )
+        
+        # Parse the response
+        task_result = run_task_response.json()
+        return SemaphoreTask(project_id, template_id, task_result.get("id"), task_result.get("status"))
+
+    def _monitor_tasks(self, session, semaphore_url, tasks, log_verbosity, monitor_timeout):
+        """
+        Poll all ``tasks`` until they finish or ``monitor_timeout`` seconds pass, streaming their output.
+
+        The poll interval starts at POLL_INITIAL_INTERVAL and grows by POLL_BACKOFF_FACTOR up
+        to POLL_MAX_INTERVAL, so short tasks are seen finishing quickly while long ones are
+        not polled needlessly often. Output is fetched at most every OUTPUT_POLL_INTERVAL
+        seconds while a task runs and once more when it finishes.
+        """
+        self.logger.info(f"Monitoring {len(tasks)} task(s) until completion...")
+        deadline = time.monotonic() + monitor_timeout
+        interval = POLL_INITIAL_INTERVAL
+        poll = 0
+        for task in tasks:
+            task.log = BufferedJobLog(self, verbosity=log_verbosity, grouping=f"task {task.task_id}")
+        
+        running = list(tasks)
+        while running:
+            poll += 1
+            for task in list(running):
+                task_url = f"{semaphore_url}/api/project/{task.project_id}/tasks/{task.task_id}"
+                try:
+                    with measure("semaphore:status"):
+                        task_status_response = session.get(task_url, verify=False)
+                    if task_status_response.status_code != 200:
+                        self.logger.warning(f"Failed to get task {task.task_id} status: {task_status_response.status_code}")
+                        continue
+                    
+                    # Parse task status
+                    task.status = task_status_response.json().get("status")
+                    self.logger.debug(f"Task {task.task_id} status: {task.status} (poll {poll})")
+                    
+                    # Pick up output lines produced since the last fetch
+                    if task.status in COMPLETED_STATUSES or (
+                        time.monotonic() - (task.output_fetched_at or 0) >= OUTPUT_POLL_INTERVAL
+                    ):
+                        self._fetch_output(session, task_url, task)
+                except Exception as e:
+                    self.logger.error(f"Error checking task {task.task_id} status: {str(e)}")
+                    continue
+                
+                # Check if task is completed
+                if task.status in COMPLETED_STATUSES:
+                    self.logger.info(f"Task {task.task_id} completed with status: {task.status}")
+                    self._finish_task(task)
+                    running.remove(task)
+            
+            if not running:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with measure("semaphore:poll_wait"):
+                time.sleep(min(interval, remaining))
+            interval = min(interval * POLL_BACKOFF_FACTOR, POLL_MAX_INTERVAL)
+        
+        # Anything still running has exceeded the monitoring deadline
+        for task in running:
+            self.logger.warning(f"Reached monitoring deadline for task {task.task_id}. Last status: {task.status}")
+            try:
+                self._fetch_output(session, f"{semaphore_url}/api/project/{task.project_id}/tasks/{task.task_id}", task)
+            except Exception as e:
+                self.logger.error(f"Error fetching task {task.task_id} output: {str(e)}")
+            self._finish_task(task)
+
+    def _fetch_output(self, session, task_url, task):
+        with measure("semaphore:output"):
+            task.output_offset = self._stream_output(
+                session, f"{task_url}/output", task.output_offset, task.archive, task.log
+            )
+        task.output_fetched_at = time.monotonic()
+
+    def _finish_task(self, task):
+        task.log.summary(f"Task {task.task_id} Output Summary (total lines: {task.output_offset})")
+        task.log.flush()
+        self._attach_output(task.task_id, task.archive)
+
+    def _stream_output(self, session, output_url, offset, archive, log):
+        """
+        Log and archive the task output lines after the first ``offset`` and return the new line count.
+
+        Semaphore always returns the whole output array, so the response is parsed as a
+        stream and lines that were already consumed are skipped without being kept.
+        """
+        with session.get(output_url, stream=True, verify=False) as response:
+            if response.status_code != 200:
+                self.logger.warning(f"Failed to get task output: {response.status_code}")
+                return offset
+            response.encoding = response.encoding or "utf-8"
+            chunks = response.iter_content(chunk_size=OUTPUT_CHUNK_SIZE, decode_unicode=True)
+            for i, output_line in enumerate(iter_json_array(chunks)):
+                if i < offset:
+                    continue
+                # Log the structure of the first output line for debugging
+                if i == 0:
+                    log.info(f"Output structure example: {output_line}")
+                # Extract data with safe fallbacks
+                output_time = output_line.get("time", "unknown")
+                output_type = output_line.get("type", "unknown")
+                output_output = output_line.get("output", "")
+                
+                archive.write(f"[{output_time}] [{output_type}] {output_output}")
+                log.info(f"Line {i+1}: [{output_time}] [{output_type}] {output_output}")
+                offset = i + 1
+        return offset
+
+    def _attach_output(self, task_id, archive):
+        """
+        Attach the compressed task output to the job result.
+        """
+        if not archive.line_count:
+            self.logger.info("Task output is empty")
+            return
+        self.create_file(f"semaphore-task-{task_id}-output.log.gz", archive.close())
+        self.logger.info(f"Attached {archive.line_count} output lines as semaphore-task-{task_id}-output.log.gz")
@@ -0,0 +1,80 @@
+"""
+requests/urllib3 connection classes that report connection phases to timing.
+
+Kept apart from timing so the timing helpers stay independent of the HTTP client;
+mount TimedHTTPAdapter where an HTTP session is built.
+"""
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .timing import record, resolve
+
+
+class _TimedConnectionMixin:
+    """
+    Records DNS and TCP connect time for each new connection.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.monotonic()
+        addresses = resolve(host, self.port)
+        resolved = time.monotonic()
+        record("dns", resolved - started)
+        # Try each resolved address in turn, as urllib3 does for a host name, so a dual-stack
+        # name still connects over IPv4 when IPv6 fails. Host header and TLS server name
+        # still use self.host.
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    continue
+            self._dns_host = addresses[-1]
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+            self._tcp_seconds = time.monotonic() - started
+            record("connect", time.monotonic() - resolved)
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    """
+    Also records the TLS handshake, as the part of connect() after the TCP connection is up.
+    """
+
+    def connect(self):
+        self._tcp_seconds = 0
+        started = time.monotonic()
+        super().connect()
+        record("tls", time.monotonic() - started - self._tcp_seconds)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    requests adapter whose connections report DNS, connect and TLS timings.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
@@ -0,0 +1,159 @@
+"""
+Per-phase latency instrumentation for outbound calls made by jobs.
+
+A job activates a TimingRecorder for the duration of its run; code making
+outbound calls reports durations to it by phase label ("dns", "connect",
+"tls", "rpc:settings_get", "semaphore:status", ...). HTTP sessions that mount
+timed_http.TimedHTTPAdapter get the DNS, TCP connect and TLS handshake phases of
+every new connection recorded automatically. At the end of the run the recorder's
+p50/p95/max per phase is logged and can be attached as a Prometheus text file.
+"""
+import math
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+METRIC_NAME = "nautobot_job_phase_seconds"
+
+
+def _percentile(ordered, fraction):
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class TimingRecorder:
+    """
+    Thread-safe collection of duration samples per phase.
+    """
+
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self._samples[phase].append(seconds)
+
+    def summary(self):
+        """
+        Return ``{phase: {"count", "sum", "p50", "p95", "max"}}`` with durations in seconds.
+        """
+        with self._lock:
+            samples = {phase: sorted(values) for phase, values in self._samples.items()}
+        return {
+            phase: {
+                "count": len(ordered),
+                "sum": sum(ordered),
+                "p50": _percentile(ordered, 0.5),
+                "p95": _percentile(ordered, 0.95),
+                "max": ordered[-1],
+            }
+            for phase, ordered in sorted(samples.items())
+        }
+
+    def summary_lines(self):
+        return [
+            f"Timing {phase}: n={stats['count']} p50={stats['p50'] * 1000:.0f}ms "
+            f"p95={stats['p95'] * 1000:.0f}ms max={stats['max'] * 1000:.0f}ms"
+            for phase, stats in self.summary().items()
+        ]
+
+    def prometheus_text(self, job_name):
+        """
+        Render the samples in the Prometheus text exposition format.
+        """
+        job_name = job_name.replace("\\", "\\\\").replace('"', '\\"')
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of outbound call phases made by a Nautobot job.",
+            f"# TYPE {METRIC_NAME} summary",
+        ]
+        max_lines = [
+            f"# HELP {METRIC_NAME}_max Longest outbound call phase made by a Nautobot job.",
+            f"# TYPE {METRIC_NAME}_max gauge",
+        ]
+        for phase, stats in self.summary().items():
+            labels = f'job="{job_name}",phase="{phase}"'
+            lines.append(f'{METRIC_NAME}{{{labels},quantile="0.5"}} {stats["p50"]:.6f}')
+            lines.append(f'{METRIC_NAME}{{{labels},quantile="0.95"}} {stats["p95"]:.6f}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {stats['sum']:.6f}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {stats['count']}")
+            max_lines.append(f"{METRIC_NAME}_max{{{labels}}} {stats['max']:.6f}")
+        return "\n".join(lines + max_lines) + "\n"
+
+
+_active_recorder = None
+
+
+def record(phase, seconds):
+    """
+    Add a sample to the active recorder, if a job has activated one.
+    """
+    recorder = _active_recorder
+    if recorder is not None:
+        recorder.add(phase, seconds)
+
+
+@contextmanager
+def measure(phase):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record(phase, time.monotonic() - started)
+
+
+@contextmanager
+def job_timing(job, prometheus_file=False):
+    """
+    Collect timings for the calls made while the block runs and report them on ``job``.
+
+    Celery runs one job per worker process at a time, so the recorder is process-wide
+    and also sees calls made from the job's worker threads.
+    """
+    global _active_recorder
+    recorder = TimingRecorder()
+    _active_recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _active_recorder = None
+        for line in recorder.summary_lines():
+            job.logger.info(line)
+        if prometheus_file and recorder.summary():
+            job.create_file(f"{job.__class__.__name__}-timings.prom", recorder.prometheus_text(job.__class__.__name__))
+
+
+_dns_cache = None
+
+
+@contextmanager
+def cached_dns():
+    """
+    Reuse successful resolve() results for the rest of the block.
+
+    Saves repeated lookups over slow resolvers while a job talks to the same hosts
+    more than once; failed lookups are not cached. Nested blocks share the outer cache.
+    """
+    global _dns_cache
+    if _dns_cache is not None:
+        yield
+        return
+    _dns_cache = {}
+    try:
+        yield
+    finally:
+        _dns_cache = None
+
+
+def resolve(host, port):
+    """
+    Resolve ``host`` to the addresses a new connection should try, in getaddrinfo order.
+    """
+    cache = _dns_cache
+    if cache is not None and host in cache:
+        return cache[host]
+    addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)))
+    if cache is not None:
+        cache[host] = addresses
+    return addresses
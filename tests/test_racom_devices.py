@@ -0,0 +1,93 @@
+import unittest
+from collections import Counter
+
+from jobs.racom_devices import DOMAIN_LOOKUP, SHARD_BY_LOCATION, shard_filters
+
+
+class FakeDevices:
+    """
+    The part of the Device queryset API that shard_filters uses, over a list of row dicts.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def exclude(self, **lookups):
+        [(lookup, value)] = lookups.items()
+        if lookup.endswith("__isnull"):
+            field = lookup[:-len("__isnull")]
+            return FakeDevices([row for row in self.rows if (row[field] is None) != value])
+        return FakeDevices([row for row in self.rows if row[lookup] != value])
+
+    def order_by(self, *fields):
+        return FakeDevices(sorted(self.rows, key=lambda row: [row[field] for field in fields]))
+
+    def count(self):
+        return len(self.rows)
+
+    def values_list(self, field, flat=False):
+        if flat:
+            return [row[field] for row in self.rows]
+        return FakeGroups(Counter(row[field] for row in self.rows))
+
+
+class FakeGroups:
+    def __init__(self, counts):
+        self.counts = counts
+
+    def annotate(self, **kwargs):
+        return self
+
+    def order_by(self, field):
+        assert field == "-count"
+        return self.counts.most_common()
+
+
+def device(pk, domain="radio", location="A"):
+    return {"pk": pk, DOMAIN_LOOKUP: domain, "location": location}
+
+
+def select(rows, shard):
+    selected = []
+    for row in rows:
+        if "pk__gte" in shard and row["pk"] < shard["pk__gte"]:
+            continue
+        if "pk__lt" in shard and row["pk"] >= shard["pk__lt"]:
+            continue
+        if "location__in" in shard and row["location"] not in shard["location__in"]:
+            continue
+        selected.append(row["pk"])
+    return selected
+
+
+class ShardFiltersTest(unittest.TestCase):
+    def test_pk_ranges_cover_devices_with_domain_once(self):
+        rows = [device(f"{pk:02}") for pk in range(10)]
+        rows[2][DOMAIN_LOOKUP] = None
+        rows[7][DOMAIN_LOOKUP] = ""
+        shards = shard_filters(FakeDevices(rows), 3)
+        self.assertEqual(shards, [{"pk__lt": "04"}, {"pk__gte": "04", "pk__lt": "08"}, {"pk__gte": "08"}])
+        with_domain = [row for row in rows if row[DOMAIN_LOOKUP]]
+        self.assertEqual(
+            [select(with_domain, shard) for shard in shards],
+            [["00", "01", "03"], ["04", "05", "06"], ["08", "09"]],
+        )
+
+    def test_more_shards_than_devices(self):
+        shards = shard_filters(FakeDevices([device("1"), device("2")]), 5)
+        self.assertEqual(shards, [{"pk__lt": "2"}, {"pk__gte": "2"}])
+
+    def test_no_devices(self):
+        self.assertEqual(shard_filters(FakeDevices([device("1", domain=None)]), 4), [])
+        self.assertEqual(shard_filters(FakeDevices([]), 4, SHARD_BY_LOCATION), [])
+
+    def test_locations_balanced_by_device_count(self):
+        sizes = {"A": 5, "B": 3, "C": 2, "D": 1}
+        rows = [device(f"{location}{i}", location=location) for location, size in sizes.items() for i in range(size)]
+        shards = shard_filters(FakeDevices(rows), 2, SHARD_BY_LOCATION)
+        self.assertEqual(shards, [{"location__in": ["A", "D"]}, {"location__in": ["B", "C"]}])
+        self.assertEqual(sorted(pk for shard in shards for pk in select(rows, shard)), sorted(row["pk"] for row in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import threading
+import unittest
+
+from jobs.racom_engine import ERROR_DEADLINE, DeadlineExceeded, PingResult, _run_probe, run_concurrently
+
+
+def ok_probe(target):
+    pk, name, domain = target
+    return PingResult(pk, name, domain, True, 200, None, "", None, 0.01)
+
+
+class RunConcurrentlyTest(unittest.TestCase):
+    def test_pulls_items_lazily_in_order(self):
+        pulled = []
+        finished = []
+
+        def items():
+            for item in range(10):
+                # A slot only frees up once a call has finished.
+                self.assertGreaterEqual(len(finished), item - 2)
+                pulled.append(item)
+                yield item
+
+        def func(item):
+            finished.append(item)
+            return item * 2
+
+        results = list(run_concurrently(func, items(), max_concurrency=2, deadline=10))
+        self.assertEqual(pulled, list(range(10)))
+        self.assertEqual(sorted(results), [(item, item * 2, None) for item in range(10)])
+
+    def test_deadline_cuts_off_pending_and_unstarted_items(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        called = []
+
+        def func(item):
+            called.append(item)
+            if item:
+                release.wait(5)
+            return item
+
+        results = list(run_concurrently(func, [0, 1, 2, 3], max_concurrency=2, deadline=0.2))
+        self.assertEqual(results[0], (0, 0, None))
+        self.assertEqual([item for item, _, _ in results[1:]], [1, 2, 3])
+        for _, result, error in results[1:]:
+            self.assertIsNone(result)
+            self.assertIsInstance(error, DeadlineExceeded)
+        # Item 3 was never started: nothing is sent once the deadline has passed.
+        self.assertEqual(sorted(called), [0, 1, 2])
+
+    def test_exception_is_yielded_as_error(self):
+        def func(item):
+            raise ValueError(item)
+
+        [(item, result, error)] = run_concurrently(func, ["boom"], deadline=10)
+        self.assertEqual((item, result), ("boom", None))
+        self.assertIsInstance(error, ValueError)
+
+
+class RunProbeTest(unittest.TestCase):
+    def test_probes_each_normalized_domain_once(self):
+        probed = []
+
+        def probe(target):
+            probed.append(target[2])
+            return ok_probe(target)
+
+        targets = [(1, "a", "radio.example"), (2, "b", "Radio.Example."), (3, "c", "other"), (4, "d", " radio.example")]
+        results = list(_run_probe(probe, targets, max_concurrency=1, deadline=10))
+        self.assertEqual(sorted(probed), ["other", "radio.example"])
+        self.assertEqual(
+            sorted((result.pk, result.name, result.domain, result.ok) for result in results),
+            [
+                (1, "a", "radio.example", True),
+                (2, "b", "Radio.Example.", True),
+                (3, "c", "other", True),
+                (4, "d", " radio.example", True),
+            ],
+        )
+
+    def test_deadline_result_fans_out_to_waiting_duplicates(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def probe(target):
+            release.wait(5)
+            return ok_probe(target)
+
+        targets = [(1, "a", "radio"), (2, "b", "RADIO"), (3, "c", "radio.")]
+        results = sorted(_run_probe(probe, targets, max_concurrency=4, deadline=0.2))
+        self.assertEqual([(result.pk, result.name, result.domain) for result in results], [
+            (1, "a", "radio"), (2, "b", "RADIO"), (3, "c", "radio."),
+        ])
+        for result in results:
+            self.assertFalse(result.ok)
+            self.assertEqual(result.error_class, ERROR_DEADLINE)
+
+
+if __name__ == "__main__":
+    unittest.main()
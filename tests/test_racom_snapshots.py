@@ -0,0 +1,128 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from jobs.racom_client import RacomError
+from jobs.racom_snapshots import ConfigSnapshotStore, config_diff, supports_partial_save
+
+
+class FakeCache:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def set_station_name(config):
+    config["main"]["RR_StationName"] = "new"
+    return config
+
+
+class ConfigDiffTest(unittest.TestCase):
+    def test_unchanged(self):
+        self.assertEqual(config_diff({"main": {"a": 1}}, {"main": {"a": 1}}), {})
+
+    def test_nested_change_keeps_only_changed_keys(self):
+        current = {"main": {"a": 1, "b": 2}, "radio": {"power": 10, "channels": [1, 2]}}
+        target = {"main": {"a": 1, "b": 3}, "radio": {"power": 10, "channels": [1, 2, 3]}}
+        self.assertEqual(config_diff(current, target), {"main": {"b": 3}, "radio": {"channels": [1, 2, 3]}})
+
+    def test_deeply_nested_and_added_keys(self):
+        current = {"interfaces": {"eth0": {"mtu": 1500, "vlan": {"id": 10}}}}
+        target = {"interfaces": {"eth0": {"mtu": 1500, "vlan": {"id": 20}}, "eth1": {"mtu": 9000}}}
+        self.assertEqual(
+            config_diff(current, target), {"interfaces": {"eth0": {"vlan": {"id": 20}}, "eth1": {"mtu": 9000}}}
+        )
+
+    def test_removed_key_cannot_be_merged(self):
+        self.assertIsNone(config_diff({"main": {"a": 1, "b": 2}}, {"main": {"a": 1}}))
+        self.assertIsNone(config_diff({"main": {}, "radio": {}}, {"main": {}}))
+
+
+class SupportsPartialSaveTest(unittest.TestCase):
+    def test_requires_recorded_version_at_or_above_minimum(self):
+        device = SimpleNamespace(software_version=SimpleNamespace(version="2.1.10"))
+        self.assertTrue(supports_partial_save(device, "2.1.9"))
+        self.assertFalse(supports_partial_save(device, "2.2"))
+        self.assertFalse(supports_partial_save(device, ""))
+        self.assertFalse(supports_partial_save(SimpleNamespace(software_version=None), "1.0"))
+        self.assertFalse(supports_partial_save(SimpleNamespace(), "1.0"))
+
+
+class DeployTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("jobs.racom_snapshots.cache", FakeCache())
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = mock.Mock()
+        self.client.settings_get.return_value = {"main": {"RR_StationName": "old", "RR_Mode": "bridge"}}
+        self.client.settings_save_init.return_value = {"session_id": "1", "interval": 1}
+        self.store = ConfigSnapshotStore(self.client)
+
+    def test_full_save_by_default(self):
+        self.store.deploy("pk", "radio", set_station_name)
+        self.client.settings_save_init.assert_called_once_with(
+            "radio", {"main": {"RR_StationName": "new", "RR_Mode": "bridge"}}, timeout=None
+        )
+
+    def test_partial_save_sends_changed_subtree(self):
+        self.store.deploy("pk", "radio", set_station_name, partial=True)
+        self.client.settings_save_init.assert_called_once_with(
+            "radio", {"main": {"RR_StationName": "new"}}, partial=True, timeout=None
+        )
+
+    def test_rejected_partial_falls_back_to_full_and_is_remembered(self):
+        full = {"main": {"RR_StationName": "new", "RR_Mode": "bridge"}}
+        self.client.settings_save_init.side_effect = [RacomError("rejected"), {"session_id": "1"}]
+        self.assertEqual(self.store.deploy("pk", "radio", set_station_name, partial=True), {"session_id": "1"})
+        self.assertEqual(
+            self.client.settings_save_init.call_args_list,
+            [
+                mock.call("radio", {"main": {"RR_StationName": "new"}}, partial=True, timeout=None),
+                mock.call("radio", full, timeout=None),
+            ],
+        )
+
+        self.client.settings_save_init.reset_mock(side_effect=True)
+        self.store.deploy("pk", "radio", set_station_name, partial=True)
+        self.client.settings_save_init.assert_called_once_with("radio", full, timeout=None)
+
+    def test_deploy_reads_fresh_config_and_drops_snapshot(self):
+        self.store.put("pk", {"main": {"RR_StationName": "stale", "RR_Mode": "bridge"}})
+        self.store.deploy("pk", "radio", set_station_name)
+        self.client.settings_get.assert_called_once_with("radio", timeout=None)
+        self.assertIsNone(self.store.get("pk"))
+
+    def test_deploy_reuses_config_just_read_from_device(self):
+        snapshot = self.store.fetch_snapshot("pk", "radio")
+        self.assertFalse(snapshot["cached"])
+        self.store.deploy("pk", "radio", set_station_name, snapshot=snapshot)
+        self.client.settings_get.assert_called_once_with("radio", timeout=None)
+        self.client.settings_save_init.assert_called_once()
+
+    def test_deploy_rereads_cached_snapshot(self):
+        self.store.put("pk", {"main": {"RR_StationName": "stale", "RR_Mode": "bridge"}})
+        snapshot = self.store.fetch_snapshot("pk", "radio")
+        self.assertTrue(snapshot["cached"])
+        self.client.settings_get.assert_not_called()
+        self.store.deploy("pk", "radio", set_station_name, snapshot=snapshot)
+        self.client.settings_get.assert_called_once_with("radio", timeout=None)
+        self.client.settings_save_init.assert_called_once_with(
+            "radio", {"main": {"RR_StationName": "new", "RR_Mode": "bridge"}}, timeout=None
+        )
+
+    def test_skips_deploy_when_device_already_has_target(self):
+        self.client.settings_get.return_value = {"main": {"RR_StationName": "new"}}
+        self.assertIsNone(self.store.deploy("pk", "radio", set_station_name))
+        self.client.settings_save_init.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from jobs.semaphore_task_runner import iter_json_array
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class IterJsonArrayTest(unittest.TestCase):
+    TEXT = ' [ {"output": "ok, done", "time": 1}, 12345, "a]b", [1, [2]], null, true ] '
+    ITEMS = [{"output": "ok, done", "time": 1}, 12345, "a]b", [1, [2]], None, True]
+
+    def test_whole_array(self):
+        self.assertEqual(list(iter_json_array([self.TEXT])), self.ITEMS)
+
+    def test_every_chunk_size(self):
+        for size in range(1, len(self.TEXT) + 1):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_array(chunked(self.TEXT, size))), self.ITEMS)
+
+    def test_yields_elements_before_array_is_complete(self):
+        items = iter_json_array(iter(['[{"a": 1}, {"b"', ": 2}", "]"]))
+        self.assertEqual(next(items), {"a": 1})
+        self.assertEqual(next(items), {"b": 2})
+        self.assertEqual(list(items), [])
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array(["", " [", " ]"])), [])
+        self.assertEqual(list(iter_json_array([])), [])
+
+    def test_rejects_non_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(['{"output": []}']))
+
+
+if __name__ == "__main__":
+    unittest.main()